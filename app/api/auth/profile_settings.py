@@ -2,16 +2,14 @@
 
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from app.deps.supabase_auth import get_current_user
-from app.services.supabase import (
-    get_user_by_id,
-    get_user_profile_history,
-    get_openai_key_and_model_for_user
-)
+from typing import Optional
+from app.deps.supabase_auth import get_current_user, get_current_username
+from app.services.supabase import get_profile_settings_bundle
 from app.services.user_metadata import get_user_metadata
 from app.core.limiter import limiter
-from app.core.config import settings
+from app.core.config import RATE_LIMIT_LOGIN
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,32 +19,33 @@ class UserMetadataResponse(BaseModel):
     openai: dict | None = None
 
 @router.get("/user-metadata", response_model=UserMetadataResponse)
-@limiter.limit(settings.RATE_LIMIT_LOGIN)
+@limiter.limit(RATE_LIMIT_LOGIN)
 async def user_metadata(
     request: Request,
     username: str = Query(..., min_length=8),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    own_username: Optional[str] = Depends(get_current_username),
 ):
     """
     Returns the user's metadata and OpenAI LLM info (never the API key).
     Auth-required: user can only fetch their own metadata.
     """
-    logger.info(f"User {user.get('username')} requests metadata for username={username}")
+    logger.info("User %s requests metadata for username=%s", own_username, username)
 
-    if user.get("username", "").lower() != username.lower():
-        logger.warning(f"Unauthorized metadata access attempt by user={user.get('username')} for username={username}")
+    if (own_username or "").lower() != username.lower():  # None-safe: no users row -> 403
+        logger.warning("Unauthorized metadata access attempt by user=%s for username=%s", own_username, username)
         raise HTTPException(status_code=403, detail="Unauthorized.")
 
-    meta = get_user_metadata(username)
+    meta = await run_in_threadpool(get_user_metadata, username, user=user, own_username=own_username)
     if not meta:
-        logger.warning(f"User {username} not found in Supabase lookup")
+        logger.warning("User %s not found in Supabase lookup", username)
         raise HTTPException(status_code=404, detail="User not found.")
 
-    logger.info(f"Successfully returned metadata for user={username}")
+    logger.info("Successfully returned metadata for user=%s", username)
     return meta
 
 @router.get("/profile-settings")
-@limiter.limit(settings.RATE_LIMIT_LOGIN)
+@limiter.limit(RATE_LIMIT_LOGIN)
 async def profile_settings(request: Request, user=Depends(get_current_user)):
     """
     Returns all user account and profile settings for dashboard display.
@@ -57,13 +56,15 @@ async def profile_settings(request: Request, user=Depends(get_current_user)):
     Protected by authentication and rate limiting.
     """
     user_id = user["user_id"]
-    logger.info(f"Profile settings requested by user_id={user_id}")
+    logger.info("Profile settings requested by user_id=%s", user_id)
 
     try:
-        user_data = get_user_by_id(user_id)
-        if not user_data:
-            logger.error(f"User not found: {user_id}")
+        # User row, uploads history and OpenAI config in a single Supabase round-trip
+        bundle = await run_in_threadpool(get_profile_settings_bundle, user_id)
+        if not bundle or not bundle.get("user"):
+            logger.warning("User not found: %s", user_id)
             raise HTTPException(status_code=404, detail="User not found.")
+        user_data = bundle["user"]
 
         # Account info
         username = user_data["username"]
@@ -75,15 +76,15 @@ async def profile_settings(request: Request, user=Depends(get_current_user)):
         profile_uploaded = user_data.get("profile_uploaded", False)
 
         # Profile uploads history (filenames, upload times, is_active)
-        uploads = get_user_profile_history(user_id) or []
-        for upload in uploads:
-            upload.pop("user_id", None)
+        # Projected in SQL (no user_id column) and coalesced to [] by the RPC
+        uploads = bundle["uploads"]
 
         # OpenAI API key (masked) and model
-        api_key, model = get_openai_key_and_model_for_user(user_id)
-        masked_key = api_key[:6] + "..." + api_key[-4:] if api_key else None
+        # Masked at write time by upsert_openai_key_and_model; the real key never reaches this route
+        openai_info = bundle.get("openai") or {}
+        masked_key, model = openai_info.get("api_key_masked"), openai_info.get("model")
 
-        logger.info(f"Returning profile settings for user_id={user_id} (uploads={len(uploads)})")
+        logger.info("Returning profile settings for user_id=%s (uploads=%d)", user_id, len(uploads))
 
         return {
             "user": {
@@ -102,8 +103,10 @@ async def profile_settings(request: Request, user=Depends(get_current_user)):
             "uploads": uploads
         }
 
-    except Exception as e:
-        logger.error(f"Error getting profile settings for user_id={user_id}: {e}", exc_info=True)
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Error getting profile settings for user_id=%s", user_id)  # Unexpected: keep traceback
         raise HTTPException(status_code=500, detail="Error fetching profile settings.")
 
 """
@@ -120,6 +123,8 @@ What It Does:
 Security & Scalability:
     - Never leaks OpenAI key.
     - All logic in service layer, not routes.
+    - Blocking supabase-py calls run in the threadpool so the event loop keeps serving other requests.
+    - /profile-settings costs one Supabase RPC (get_profile_settings), TTL-cached per user.
     - Easy to extend for usage stats, analytics, or plan features.
 
 --------------------------------------------------------------------
@@ -1,10 +1,12 @@
 # app/api/auth/register.py
 
 import logging
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
-from supabase import create_client, Client
-from app.core.config import settings
+from app.core.config import RATE_LIMIT_REGISTER
+from supabase import AuthApiError
+from app.services.supabase import supabase, get_user_id_by_username
 from app.utils.validators import is_valid_username, is_strong_password
 from app.core.limiter import limiter
 
@@ -12,11 +14,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-supabase: Client = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_ROLE_KEY
-)
-
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
@@ -24,9 +21,31 @@ class RegisterRequest(BaseModel):
     last_name: str
     username: str
 
+async def _is_username_taken(e: AuthApiError, username: str) -> bool:
+    """
+    True if create_user failed because on_auth_user_created hit users_username_lower_idx.
+    The trigger raises 'username_taken' for exactly that case; GoTrue may hide the Postgres
+    message behind a generic "Database error ...", so that case is confirmed by a lookup.
+    """
+    message = (e.message or "").lower()
+    if "username_taken" in message:
+        return True
+    if "database error" not in message:
+        return False
+    return await run_in_threadpool(get_user_id_by_username, username) is not None  # Not-found is never cached
+
+def _send_invite_safe(email: str):
+    """Sends the invite/magic link email; failures are logged and never surface to the user."""
+    try:
+        invite_res = supabase.auth.admin.invite_user_by_email(email)
+        if hasattr(invite_res, "error") and invite_res.error:
+            logger.warning("Magic link sending failed for %s: %s", email, invite_res.error)
+    except Exception as e:
+        logger.warning("Failed to send magic link for %s: %s", email, e)
+
 @router.post("/register")
-@limiter.limit(settings.RATE_LIMIT_REGISTER)
-async def register_user(request: Request, req: RegisterRequest):
+@limiter.limit(RATE_LIMIT_REGISTER)
+async def register_user(request: Request, req: RegisterRequest, background_tasks: BackgroundTasks):
     """
     Registers a new user in both Supabase Auth and your own users table.
     - Enforces username and password policy.
@@ -38,84 +57,65 @@ async def register_user(request: Request, req: RegisterRequest):
     """
     username = req.username.lower()
     email = req.email.lower()
-    logger.info(f"Attempting registration for email: {email}")
+    logger.info("Attempting registration for email: %s", email)
 
     # 1. Username validity (≥8 chars, only letters/numbers, at least one letter)
     if not is_valid_username(username):
-        logger.warning(f"Invalid username attempted: {username}")
+        logger.warning("Invalid username attempted: %s", username)
         raise HTTPException(
             status_code=400,
-            detail="Username must be at least 8 characters, only letters and numbers, and contain at least one letter.",
+            detail="Username must be 8-32 characters, only letters and numbers, and contain at least one letter.",
         )
 
     # 2. Password strength
     if not is_strong_password(req.password):
-        logger.warning(f"Weak password for email: {email}")
+        logger.warning("Weak password for email: %s", email)
         raise HTTPException(
             status_code=400,
-            detail="Password must be at least 8 characters, with uppercase, lowercase, a number, and a special character."
+            detail="Password must be 8-128 characters, with uppercase, lowercase, a number, and a special character."
         )
 
-    # 3. Email uniqueness (case-insensitive)
-    user_check = supabase.table("users").select("id").eq("email", email).maybe_single().execute()
-    if user_check and getattr(user_check, "data", None):
-        logger.warning(f"Registration failed: Email already exists: {email}")
-        raise HTTPException(status_code=400, detail="Email already exists.")
-
-    # 4. Username uniqueness
-    username_check = supabase.table("users").select("id").eq("username", username).maybe_single().execute()
-    if username_check and getattr(username_check, "data", None):
-        logger.warning(f"Registration failed: Username already exists: {username}")
-        raise HTTPException(status_code=400, detail="Username already exists.")
-
-    # 5. Create user in Supabase Auth (Admin API)
+    # 3. Create user in Supabase Auth (Admin API)
+    #    The on_auth_user_created trigger copies user_metadata into the users table in the same transaction.
+    #    Uniqueness is enforced by the DB (auth.users email + users_*_lower_idx), so there is no pre-check:
+    #    a duplicate aborts the whole insert and nothing has to be rolled back.
     try:
-        auth_res = supabase.auth.admin.create_user({
+        # supabase-py's client is sync: run it in the threadpool so concurrent signups don't block the event loop
+        auth_res = await run_in_threadpool(supabase.auth.admin.create_user, {
             "email": email,
             "password": req.password,
-            "email_confirm": False
+            "email_confirm": False,
+            "user_metadata": {
+                "first_name": req.first_name,
+                "last_name": req.last_name,
+                "username": username,
+            },
         })
-    except Exception as e:
-        logger.error(f"Auth user creation exception for {email}: {e}")
+    except AuthApiError as e:
+        if e.code == "email_exists":
+            logger.warning("Registration failed: Email already exists: %s", email)
+            raise HTTPException(status_code=400, detail="Email already exists.")
+        if await _is_username_taken(e, username):
+            logger.warning("Registration failed: Username already exists: %s (%s)", username, e.message)
+            raise HTTPException(status_code=400, detail="Username already exists.")
+        logger.error("Auth user creation error for %s: %s %s", email, e.code, e.message)  # Known API error: no traceback
+        raise HTTPException(status_code=500, detail="Failed to create Auth user.")
+    except Exception:
+        logger.exception("Auth user creation exception for %s", email)  # Unexpected: keep traceback
         raise HTTPException(status_code=500, detail="Failed to create Auth user.")
 
     user_obj = getattr(auth_res, "user", None)
     if not user_obj:
         detail = getattr(auth_res, "error", None)
-        logger.error(f"Auth user creation error for {email}: {detail}")
+        logger.error("Auth user creation error for %s: %s", email, detail)
         raise HTTPException(status_code=500, detail="Auth user creation failed.")
     user_id = str(user_obj.id)
-    logger.info(f"Created Auth user_id {user_id} for email {email}")
-
-    # 6. Insert into your users table
-    try:
-        db_res = supabase.table("users").insert({
-            "id": user_id,
-            "email": email,
-            "first_name": req.first_name,
-            "last_name": req.last_name,
-            "username": username,
-            "plan": "free",
-            "profile_uploaded": False
-        }).execute()
-    except Exception as e:
-        logger.error(f"DB insert exception for user {email}: {e}")
-        raise HTTPException(status_code=500, detail="Could not insert user metadata.")
+    logger.info("Created Auth user_id %s for email %s", user_id, email)
 
-    if db_res is None or getattr(db_res, "error", None):
-        msg = getattr(db_res.error, "message", None) if db_res and db_res.error else "Could not insert user metadata."
-        logger.error(f"DB insert error for user {email}: {msg}")
-        raise HTTPException(status_code=500, detail=msg)
-
-    # 7. Send invite/magic link email (does not block registration)
-    try:
-        invite_res = supabase.auth.admin.invite_user_by_email(email)
-        if hasattr(invite_res, "error") and invite_res.error:
-            logger.warning(f"Magic link sending failed for {email}: {invite_res.error}")
-    except Exception as e:
-        logger.warning(f"Failed to send magic link for {email}: {e}")
+    # 4. Send invite/magic link email after the response is sent (does not block registration)
+    background_tasks.add_task(_send_invite_safe, email)
 
-    logger.info(f"User registered successfully: {email}")
+    logger.info("User registered successfully: %s", email)
 
     return {
         "message": "User registered successfully. Please check your email for the confirmation link.",
@@ -128,10 +128,11 @@ async def register_user(request: Request, req: RegisterRequest):
     Handles full registration flow for new users (API, dashboard, onboarding).
 
 🔍 What It Does:
-    - Validates username, password, and checks for unique email/username.
+    - Validates username and password; email/username uniqueness is enforced by DB constraints.
     - Creates user in Supabase Auth (secure, backend only).
-    - Inserts metadata in your own users table (syncs with Auth user_id).
-    - Sends magic link (invite) for email confirmation (does not block user creation).
+    - users table row is created by the on_auth_user_created DB trigger (syncs with Auth user_id).
+    - Sends magic link (invite) for email confirmation in a background task (does not block the response).
+    - Blocking Supabase Admin calls run in the threadpool (event loop stays free under concurrent signups).
 
 📌 Used By:
     - SaaS dashboard and API for public signups.
@@ -145,9 +146,10 @@ async def register_user(request: Request, req: RegisterRequest):
     - Magic link/email delivery failures are logged but do not block signup.
 
 🔒 Security:
-    - All sensitive actions (user creation, metadata insert) are backend only.
+    - All sensitive actions (user creation, metadata) are backend only.
     - No API key or password is ever exposed in logs.
     - No row is created in your users table without successful Auth registration.
+    - Concurrent signups for the same email/username cannot both succeed (unique indexes, no SELECT-then-INSERT race).
 
 🚦 Extensibility:
     - Easily add additional fields (plan, referral, etc).
@@ -1,42 +1,34 @@
 # app/api/auth/update_key.py ** NEW
 
 import logging
+from typing import Literal
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, constr
 from app.deps.supabase_auth import get_current_user
 from app.services.supabase import upsert_openai_key_and_model
+from app.services import cache
 from app.core.limiter import limiter
-from app.core.config import settings
-from pydantic import validator
+from app.core.config import RATE_LIMIT_UPDATE_KEY
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # You may want to restrict to models supported by your SaaS
-ALLOWED_MODELS = [
+# (validated by pydantic-core as part of the schema; add/remove as needed)
+AllowedModel = Literal[
     "gpt-3.5-turbo",
     "gpt-4o",
     "gpt-4",
     "gpt-4-turbo",
-    # Add/remove as needed
 ]
 
 class OpenAIKeyUpdateRequest(BaseModel):
     api_key: constr(min_length=40, max_length=100)  # Basic length check for OpenAI keys
-    model: str
-
-    # Optionally enforce allowed models (if using dropdown in UI)
-    @validator("model")
-    def validate_model(cls, value):
-        if value not in ALLOWED_MODELS:
-            raise ValueError(f"Model {value} is not supported.")
-        return value
-
-
-
+    model: AllowedModel  # Unsupported models are rejected with a 422 before the handler runs
 
 @router.post("/update-key")
-@limiter.limit(settings.RATE_LIMIT_UPDATE_KEY)
+@limiter.limit(RATE_LIMIT_UPDATE_KEY)
 async def update_openai_key(
     request: Request,
     data: OpenAIKeyUpdateRequest,
@@ -46,14 +38,16 @@ async def update_openai_key(
     Stores or updates the user's OpenAI API key and preferred model.
     """
     user_id = user["user_id"]
-    logger.info(f"User {user_id} updating OpenAI API key/model.")
+    logger.info("User %s updating OpenAI API key/model.", user_id)
 
     try:
-        upsert_openai_key_and_model(user_id, data.api_key, data.model)
-        logger.info(f"OpenAI API key/model updated for user {user_id}")
+        await run_in_threadpool(upsert_openai_key_and_model, user_id, data.api_key, data.model)
+        cache.invalidate(f"openai:{user_id}")
+        cache.invalidate(f"settings:{user_id}")
+        logger.info("OpenAI API key/model updated for user %s", user_id)
         return {"message": "Key updated successfully."}
-    except Exception as e:
-        logger.error(f"Failed to update OpenAI key/model for user {user_id}: {e}", exc_info=True)
+    except Exception:
+        logger.exception("Failed to update OpenAI key/model for user %s", user_id)  # Unexpected: keep traceback
         raise HTTPException(status_code=500, detail="Failed to update OpenAI key/model.")
 
 """
@@ -74,7 +68,7 @@ Used By:
 
 Good Practice:
     - Never logs or exposes actual API keys (just that an update occurred).
-    - Restricts models to those supported (sync this with your frontend dropdown).
+    - Restricts models to those supported via a Literal type (sync this with your frontend dropdown).
     - Rate-limits to prevent abuse.
 
 Security & Scalability:
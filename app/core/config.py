@@ -1,12 +1,18 @@
 # app/core/config.py
 
-from pydantic_settings import BaseSettings
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 
 # ---------------------------------------------
 # Settings class for all configuration values
 # ---------------------------------------------
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(
+        env_file=".env",    # Load variables from .env by default
+        frozen=True,        # Immutable after load (safe to share, cheap attribute access)
+    )
+
     # Qdrant settings
     QDRANT_URL: str
     QDRANT_API_KEY: str
@@ -19,9 +25,17 @@ class Settings(BaseSettings):
     SUPABASE_ANON_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
 
+    # Encryption key for users' OpenAI API keys at rest (base64-encoded 32 bytes, AES-256-GCM)
+    OPENAI_KEY_ENCRYPTION_KEY: str
+
     # Frontend URL (used for CORS)
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # Redis (shared rate-limit state across workers)
+    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+
+    RATE_LIMIT_REGISTER: str = "5/hour"
     RATE_LIMIT_FORGOT_PASSWORD: str = "5/hour"
     RATE_LIMIT_LOGIN: str = "10/minute"
     RATE_LIMIT_RESET_PASSWORD: str = "5/hour"
@@ -32,11 +46,15 @@ class Settings(BaseSettings):
     RATE_LIMIT_CHAT: str = "10/minute"
     RATE_LIMIT_CHAT_STREAM: str = "20/minute"
 
+    # Profile uploads
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # 10 MB; larger uploads are rejected with 413 while streaming
+    EXTRACTION_WORKERS: Optional[int] = None  # Text extraction processes per Uvicorn worker (None = CPU count)
+
     DEFAULT_CHUNK_SIZE: int = 400
     DEFAULT_CHUNK_OVERLAP: int = 20
 
-    class Config:
-        env_file = ".env"  # Load variables from .env by default
+    # Chat context: reuse a recent search when the new question's embedding is this similar (cosine)
+    SEMANTIC_CACHE_THRESHOLD: float = 0.86
 
 # ---------------------------------------------
 # Singleton pattern for config (caches instance)
@@ -47,6 +65,20 @@ def get_settings():
 
 settings = get_settings()  # This is what you import elsewhere
 
+# ---------------------------------------------
+# Rate limits bound once at import (used by @limiter.limit decorators)
+# ---------------------------------------------
+RATE_LIMIT_REGISTER = settings.RATE_LIMIT_REGISTER
+RATE_LIMIT_FORGOT_PASSWORD = settings.RATE_LIMIT_FORGOT_PASSWORD
+RATE_LIMIT_LOGIN = settings.RATE_LIMIT_LOGIN
+RATE_LIMIT_RESET_PASSWORD = settings.RATE_LIMIT_RESET_PASSWORD
+RATE_LIMIT_DELETE_PROFILE = settings.RATE_LIMIT_DELETE_PROFILE
+RATE_LIMIT_UPLOAD_FILE = settings.RATE_LIMIT_UPLOAD_FILE
+RATE_LIMIT_UPLOAD_STRUCTURED = settings.RATE_LIMIT_UPLOAD_STRUCTURED
+RATE_LIMIT_UPDATE_KEY = settings.RATE_LIMIT_UPDATE_KEY
+RATE_LIMIT_CHAT = settings.RATE_LIMIT_CHAT
+RATE_LIMIT_CHAT_STREAM = settings.RATE_LIMIT_CHAT_STREAM
+
 """
 ------------------------------------------------
 ✅ Purpose:
@@ -56,7 +88,8 @@ This file makes it easy to switch between dev/prod and keeps secrets out of code
 🔍 What It Does:
 - Loads and type-checks all sensitive config from environment or .env file.
 - Exposes a singleton `settings` object for safe, easy access throughout your app.
-- Caches config for performance (using @lru_cache).
+- Caches config for performance (using @lru_cache); settings are frozen after load.
+- Exports RATE_LIMIT_* module constants for route decorators.
 
 📌 Used By:
 - Any backend module that needs credentials, URLs, or other env-specific config.
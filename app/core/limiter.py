@@ -1,40 +1,200 @@
 # app/core/limiter.py
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import ipaddress
+import logging
+import time
+from functools import lru_cache, wraps
+
+from fastapi import HTTPException, Request
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------
+# Token Bucket (executed atomically in Redis)
+# ---------------------------------------------
+# KEYS[1] = bucket key
+# ARGV    = rate (tokens/sec), burst, now (ms), cost
+# Returns the remaining tokens, or -1 if the request must be rejected.
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call("HMGET", key, "tokens", "ts")
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+
+local remaining = -1
+if tokens >= cost then
+    tokens = tokens - cost
+    remaining = math.floor(tokens)
+end
+
+redis.call("HSET", key, "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", key, math.ceil(burst / rate * 1000))
+return remaining
+"""
+
+PERIOD_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+def parse_rate(limit: str) -> tuple[float, int]:
+    """
+    Parses a limit string like "10/minute" into (rate_per_sec, burst).
+    The burst equals the configured count, so a fresh bucket allows the full quota at once.
+    """
+    count, _, period = limit.partition("/")
+    period = period.strip().lower().rstrip("s")
+    if period not in PERIOD_SECONDS:
+        raise ValueError(f"Unsupported rate limit period in '{limit}'")
+    burst = int(count)
+    return burst / PERIOD_SECONDS[period], burst
+
+@lru_cache(maxsize=4096)
+def _normalize_ip(host: str) -> str:
+    """
+    Canonical rate-limit form of a client address, parsed once per distinct host (LRU).
+    - IPv4 (and IPv4-mapped IPv6) -> dotted quad.
+    - IPv6 -> its /64 network: one subscriber usually owns a whole /64, so rotating
+      addresses inside it must not mint new buckets.
+    Non-IP hosts (e.g. test clients, unix sockets) are returned unchanged.
+    """
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if ip.version == 6:
+        if ip.ipv4_mapped:
+            return str(ip.ipv4_mapped)
+        return str(ipaddress.IPv6Network((ip, 64), strict=False).network_address) + "/64"
+    return str(ip)
+
+def get_remote_address(request: Request) -> str:
+    """Returns the normalized client IP address (falls back to localhost when unavailable)."""
+    return _normalize_ip(request.client.host) if request.client else "127.0.0.1"
+
+def _extract_identity(request: Request) -> str:
+    """
+    Rate-limit identity for a request: the verified user id when get_current_user ran for this route
+    (it sets request.state.rl_key after checking the JWT signature), else the client IP.
+    Unauthenticated routes (login, register, password reset) therefore always key on IP:
+    a Bearer header sent there is never trusted to pick the bucket.
+    """
+    key = getattr(request.state, "rl_key", None)
+    if key:
+        return key
+    key = f"ip:{get_remote_address(request)}"
+    request.state.rl_key = key  # Stacked limit decorators reuse it
+    return key
+
+class Limiter:
+    """
+    Redis-backed rate limiter exposing the same `@limiter.limit("10/minute")` decorator as SlowAPI.
+    State is shared across all Uvicorn workers and survives restarts.
+    """
+
+    def __init__(self, key_func, redis_url: str, max_connections: int = 50):
+        self.key_func = key_func
+        self.pool = aioredis.ConnectionPool.from_url(redis_url, max_connections=max_connections)
+        self.redis = aioredis.Redis(connection_pool=self.pool)
+        self.script = self.redis.register_script(TOKEN_BUCKET_LUA)  # EVALSHA with NOSCRIPT fallback
+
+    async def hit(self, key: str, rate: float, burst: int, cost: int = 1) -> int:
+        """Consumes `cost` tokens from the bucket; returns remaining tokens or -1 if rejected."""
+        now_ms = int(time.time() * 1000)
+        return int(await self.script(keys=[key], args=[rate, burst, now_ms, cost]))
+
+    def limit(self, limit_value: str, cost: int = 1):
+        """
+        Decorator enforcing `limit_value` on an endpoint.
+        The endpoint must accept a `request: Request` parameter (same contract as SlowAPI).
+        """
+        rate, burst = parse_rate(limit_value)
+
+        def decorator(func):
+            route = f"{func.__module__}.{func.__name__}"
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                request = kwargs.get("request")
+                if request is None:
+                    request = next((a for a in args if isinstance(a, Request)), None)
+                if request is None:
+                    raise RuntimeError(f"Rate-limited endpoint {route} must accept a 'request' argument")
+
+                key = f"rl:{route}:{self.key_func(request)}"
+                try:
+                    remaining = await self.hit(key, rate, burst, cost)
+                except RedisError as e:
+                    # Fail open: a Redis outage must not take the API down with it
+                    logger.warning(f"Rate limiter unavailable for {route}, allowing request: {e}")
+                    remaining = 0
+
+                if remaining < 0:
+                    logger.warning(f"Rate limit exceeded for {key} ({limit_value})")
+                    raise HTTPException(status_code=429, detail="Too many requests. Please slow down.")
+
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
 
 # ---------------------------------------------
 # Rate Limiting Configuration
 # ---------------------------------------------
-# Limits each unique IP (get_remote_address) to 60 requests per minute by default.
+# Limits each authenticated user (JWT sub), or each IP for anonymous calls; per-route limits come from settings.RATE_LIMIT_*.
 limiter = Limiter(
-    key_func=get_remote_address,     # Use the remote IP address as the identifier
-    default_limits=["60/minute"]     # Change as needed per API best practices
+    key_func=_extract_identity,      # User id from the Bearer token, falling back to the remote IP
+    redis_url=settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
 )
 
 """
 ------------------------------------------------
 ✅ Purpose:
-Protects your backend API from brute force, abuse, and accidental DDoS by rate-limiting clients per IP.
+Protects your backend API from brute force, abuse, and accidental DDoS by rate-limiting clients per user (or per IP).
 
 🔍 What It Does:
-- Instantiates a `Limiter` from SlowAPI with a simple global rate limit.
-- Used as middleware and exception handler in `main.py` to catch and handle too many requests.
+- Implements a token bucket per route and client, stored in Redis.
+- Authenticated requests are keyed on the verified JWT `sub` (no shared NAT/proxy buckets); anonymous ones on IP
+  (normalized once per host via an LRU; IPv6 clients are grouped by /64).
+- Refill + consume run in a single Lua script, so checks are atomic and shared across all workers.
+- Exposes `@limiter.limit("10/minute")`, raising HTTP 429 when the bucket is empty.
 
 📌 Used By:
-- The FastAPI app (see main.py for app.state.limiter and SlowAPIMiddleware setup).
-- Any endpoint can override or extend limits with SlowAPI decorators if needed.
+- Every rate-limited endpoint (login, register, upload, chat, etc).
+- Limits are configured per route via settings.RATE_LIMIT_* ("N/second|minute|hour|day").
 
 🧠 Good Practices:
 - Set a **reasonable default** for public APIs (e.g., 60/minute or less for free-tier).
-- For more advanced plans, implement per-user limits using a key function based on JWT claims.
+- For more advanced plans, derive per-plan limits from the same identity key.
 - Customize limits for sensitive endpoints (login, registration) to slow down abuse.
 - Log or monitor rate-limit violations for ops visibility.
 
 🔐 Security:
 - Helps prevent basic denial-of-service and bot attacks.
 - Not a substitute for true WAF/firewall, but excellent as first defense in SaaS.
-- For production, consider using real user ID or API key for `key_func` if you want true per-user limits.
+- The user bucket is only used once get_current_user has verified the token (dependencies run before the
+  limit check); routes without it, like /login, always use the IP bucket, so forged tokens cannot mint buckets.
+- Fails open if Redis is unreachable (logged as a warning) so an outage does not block all traffic.
+- One Redis round-trip per limited request; the connection pool is sized via REDIS_MAX_CONNECTIONS.
 
 ------------------------------------------------
 """
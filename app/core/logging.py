@@ -1,6 +1,8 @@
+import atexit
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
 # -------------- CONFIGURATION -------------------
 
@@ -25,14 +27,44 @@ class ConsoleFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        # One formatter per level with the ANSI codes baked into the format string (built once)
+        self._level_formatters = {
+            level: logging.Formatter(color + fmt + self.RESET, datefmt)
+            for level, color in self.COLORS.items()
+        }
+
     def format(self, record):
-        color = self.COLORS.get(record.levelname, "")
-        message = super().format(record)
-        return f"{color}{message}{self.RESET}"
+        formatter = self._level_formatters.get(record.levelname)
+        if formatter is None:
+            return super().format(record)
+        return formatter.format(record)
 
 # -------------- LOGGER INITIALIZATION ------------
 
+_listener = None       # Background thread writing queued records to the real handlers
+_queue_handler = None  # The single handler attached to the root logger
+_initialized = False   # init_logging() binds handlers once per process
+
+def _stop_listener():
+    """Explicit shutdown: stops the listener thread (flushing queued records) and detaches the queue handler."""
+    global _listener, _queue_handler, _initialized
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    _initialized = False
+
+atexit.register(_stop_listener)  # Flush pending records on shutdown
+
 def init_logging():
+    global _listener, _queue_handler, _initialized
+    if _initialized:
+        return  # Already configured in this process (repeated imports / reloads are no-ops)
+
     logger = logging.getLogger()
     logger.setLevel(LOG_LEVEL)
 
@@ -46,15 +78,13 @@ def init_logging():
     console_handler.setFormatter(ConsoleFormatter(LOG_FORMAT, DATE_FORMAT))
     console_handler.setLevel(LOG_LEVEL)
 
-    # Avoid duplicate logs
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    else:
-        # Clear and reset handlers if already present
-        logger.handlers = []
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    # Request code only enqueues records (non-blocking); the listener thread does the disk/console I/O
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+
+    _queue_handler = QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
 
     # Make FastAPI/Uvicorn logs go through our logger
     for uvicorn_logger in ("uvicorn", "uvicorn.error", "uvicorn.access"):
@@ -62,6 +92,8 @@ def init_logging():
         uv_logger.handlers = []
         uv_logger.propagate = True
 
+    _initialized = True
+
 # -------------- USAGE EXAMPLE -------------------
 
 # In every file: (at the top)
@@ -0,0 +1,71 @@
+# app/core/process_pool.py
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------
+# CPU-bound work (PDF text extraction), one pool per Uvicorn worker, created on first use
+# -----------------------------------------
+EXTRACTION_POOL_SIZE = settings.EXTRACTION_WORKERS or os.cpu_count() or 1  # Also caps per-document fan-out
+_extraction_pool: Optional[ProcessPoolExecutor] = None
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared process pool for text extraction, building it on the first call.
+    Workers are spawned (not forked): the parent runs threads (logging listener, HTTP pools)
+    that must not be copied into children mid-state.
+    """
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=EXTRACTION_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info(f"Extraction process pool started (max_workers={EXTRACTION_POOL_SIZE})")
+    return _extraction_pool
+
+def reset_extraction_pool(broken: ProcessPoolExecutor):
+    """
+    Drops a pool broken by a dead worker (MuPDF segfault, OOM kill: BrokenProcessPool), so the next
+    get_extraction_pool() call starts a fresh one. No-op if another request already replaced it.
+    """
+    global _extraction_pool
+    if _extraction_pool is broken:
+        _extraction_pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Extraction process pool was broken and has been discarded")
+
+def shutdown_extraction_pool():
+    """Stops the pool's worker processes (called from the app lifespan on shutdown)."""
+    global _extraction_pool
+    if _extraction_pool is not None:
+        _extraction_pool.shutdown(wait=True, cancel_futures=True)
+        _extraction_pool = None
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Process pool for CPU-bound work, so PDF parsing runs outside the GIL
+    and never stalls the event loop or the threadpool.
+
+What It Does:
+    - get_extraction_pool(): lazily creates one ProcessPoolExecutor per Uvicorn worker.
+    - reset_extraction_pool(): discards a pool broken by a crashed worker (rebuilt on next use).
+    - shutdown_extraction_pool(): stops it cleanly on app shutdown (see app/main.py lifespan).
+
+Used By:
+    - app/utils/text_extraction.py (extract_text_in_pool: whole files, or page ranges of large PDFs)
+
+Good Practice:
+    - Pass small, picklable arguments (file paths, not bytes) to pool tasks.
+    - Size with EXTRACTION_WORKERS: total processes = WEB_CONCURRENCY x EXTRACTION_WORKERS
+      (default: CPU count per worker), so lower it when running several Uvicorn workers.
+
+--------------------------------------------------------------------
+"""
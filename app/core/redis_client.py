@@ -0,0 +1,40 @@
+# app/core/redis_client.py
+
+from functools import lru_cache
+from redis import asyncio as aioredis
+from app.core.config import settings
+
+# -----------------------------------------
+# Redis client for shared caches (one pool per process, created on first use)
+# -----------------------------------------
+# Short timeouts: these caches are an optimization, a slow Redis must fail fast, not stall requests.
+REDIS_CACHE_TIMEOUT = 0.5  # Seconds, for both connect and socket reads
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> aioredis.Redis:
+    """Async client, for code running on the event loop."""
+    return aioredis.Redis.from_url(
+        settings.REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_CACHE_TIMEOUT,
+        socket_connect_timeout=REDIS_CACHE_TIMEOUT,
+    )
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Shared Redis client for cross-worker caches (same REDIS_URL as the rate limiter).
+
+What It Does:
+    - get_async_redis(): lazily built asyncio client (event-loop code).
+
+Used By:
+    - app/utils/embeddings.py (persistent embedding cache)
+    - app/services/vectorstore.py (bulk-upload indexing pause shared across workers)
+
+Good Practice:
+    - Treat Redis as optional for caching: catch RedisError, log, and fall through to the source.
+    - The rate limiter keeps its own pool (app/core/limiter.py) so cache traffic cannot starve it.
+
+--------------------------------------------------------------------
+"""
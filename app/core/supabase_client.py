@@ -0,0 +1,70 @@
+# app/core/supabase_client.py
+
+import httpx
+from functools import lru_cache
+from supabase import create_client, Client, ClientOptions
+from app.core.config import settings
+
+# -----------------------------------------
+# HTTP connection pool settings (shared by every Supabase client)
+# -----------------------------------------
+SUPABASE_HTTP_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=100,
+    keepalive_expiry=30,     # Drop idle sockets before Supabase's load balancer does
+)
+
+def pooled_http_client() -> httpx.Client:
+    """
+    Builds a keep-alive HTTP/2 httpx client to hand to supabase-py (one retry on connect errors).
+    HTTP/2 multiplexes concurrent PostgREST/Auth calls over a few TLS connections (needs httpx[http2]).
+    Each Supabase client gets its OWN instance: the SDK sets auth headers per client.
+    """
+    return httpx.Client(transport=httpx.HTTPTransport(http2=True, limits=SUPABASE_HTTP_LIMITS, retries=1))
+
+# -----------------------------------------
+# Public (ANON key) client, one per process, created on first use
+# -----------------------------------------
+@lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    """
+    Returns the shared ANON-key client, building it on the first call (not at import time).
+    Used only for stateless Auth calls on behalf of end users (sign-in, password reset emails).
+    No session is persisted or auto-refreshed: this client is shared by all concurrent requests.
+    """
+    return create_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_ANON_KEY,
+        options=ClientOptions(
+            httpx_client=pooled_http_client(),
+            persist_session=False,
+            auto_refresh_token=False,
+        ),
+    )
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Single, process-wide Supabase client for public (ANON key) Auth operations,
+    plus the pooled HTTP client factory used by every Supabase client in the app.
+
+What It Does:
+    - Lazily creates the ANON-key client once (login, forgot-password) via get_supabase().
+    - Exposes pooled_http_client() so all clients reuse keep-alive HTTP/2 connections (100 idle / 200 max).
+
+Used By:
+    - app/routes/auth/login.py, app/routes/auth/forgot_password.py
+    - app/services/supabase.py (the single service-role client, shared by every service module)
+
+Good Practice:
+    - Call `get_supabase()` instead of calling create_client per module (no import-time side effects,
+      faster worker cold start, tests that never log in never build the client).
+    - Never use this client for table reads/writes: after a sign-in the SDK would attach that
+      user's token to it. DB access goes through app/services/supabase.py.
+
+Security & Scalability:
+    - ANON key only; admin/service-role operations stay in app/services/supabase.py.
+    - One connection pool per client instead of one per importing module.
+
+--------------------------------------------------------------------
+"""
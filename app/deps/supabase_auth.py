@@ -1,12 +1,24 @@
 # app/deps/supabase_auth.py
 
-from fastapi import Header, HTTPException
-from jose import jwt
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+import json
+import logging
+import jwt
+from jwt.algorithms import ECAlgorithm
 import requests
-from functools import lru_cache
+from requests.adapters import HTTPAdapter
+import threading
+import time
+from hashlib import blake2b
+from typing import Optional
+from cachetools import TTLCache
 from app.core.config import settings
+from app.services.supabase import get_user_by_id
 import os
 
+logger = logging.getLogger(__name__)
+
 # --- Supabase Auth JWT validation setup ---
 
 # Use the new JWKS endpoint (as of Supabase 2024+) for ECC (ES256) JWTs.
@@ -15,48 +27,139 @@ JWKS_URL = f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json"
 # ANON API Key, used for requests to JWKS endpoint. Load from env or config.
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY") or settings.SUPABASE_ANON_KEY
 
-@lru_cache()
-def get_supabase_jwks():
+# Keep-alive session for JWKS downloads (refreshes reuse the TCP+TLS connection)
+JWKS_FETCH_TIMEOUT = 2.0  # Seconds; a slow JWKS endpoint must not hold auth requests hostage
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# JWKS cache: refreshed every JWKS_TTL seconds, or early when a token carries an unknown `kid` (key rotation).
+JWKS_TTL = 300
+JWKS_MIN_REFRESH_INTERVAL = 30  # Floor between forced refreshes (random `kid`s cannot hammer the endpoint)
+_jwks = (None, {}, 0.0)         # (jwks_raw, {kid: key}, fetched_at), swapped atomically
+_jwks_lock = threading.Lock()
+
+def _fetch_supabase_jwks():
     """
-    Downloads and caches the JWKS used to validate Supabase JWT tokens.
+    Downloads the JWKS used to validate Supabase JWT tokens.
     Sends 'apikey' header as required by Supabase for all non-public endpoints.
-    Caching avoids unnecessary network requests for every validation.
+    Returns (jwks_raw, {kid: EllipticCurvePublicKey}): each JWK is parsed into a key object once, here.
     """
     headers = {"apikey": SUPABASE_ANON_KEY} if SUPABASE_ANON_KEY else {}
-    resp = requests.get(JWKS_URL, headers=headers)
+    resp = _session.get(JWKS_URL, headers=headers, timeout=JWKS_FETCH_TIMEOUT)
     resp.raise_for_status()  # Raise HTTP 4xx/5xx as exceptions
-    return resp.json()       # JWKS format
+    jwks_raw = resp.json()   # JWKS format
+    keys = {
+        jwk["kid"]: ECAlgorithm.from_jwk(json.dumps(jwk))
+        for jwk in jwks_raw.get("keys", [])
+        if jwk.get("kid") and jwk.get("kty") == "EC"
+    }
+    return jwks_raw, keys
+
+def _jwks_is_fresh(fetched_at: float, force_refresh: bool) -> bool:
+    age = time.time() - fetched_at
+    return age < JWKS_MIN_REFRESH_INTERVAL or (age < JWKS_TTL and not force_refresh)
+
+def get_supabase_jwks(force_refresh: bool = False):
+    """
+    Returns the cached (jwks_raw, {kid: key}), re-downloading it when older than JWKS_TTL
+    (or on force_refresh, at most once per JWKS_MIN_REFRESH_INTERVAL).
+    If a refresh fails, the last known keys keep being served (stale-while-revalidate).
+    """
+    global _jwks
+    jwks_raw, keys, fetched_at = _jwks
+    if jwks_raw is not None and _jwks_is_fresh(fetched_at, force_refresh):
+        return jwks_raw, keys
+
+    with _jwks_lock:
+        jwks_raw, keys, fetched_at = _jwks  # Another thread may have refreshed while we waited
+        if jwks_raw is not None and _jwks_is_fresh(fetched_at, force_refresh):
+            return jwks_raw, keys
+        try:
+            jwks_raw, keys = _fetch_supabase_jwks()
+            _jwks = (jwks_raw, keys, time.time())
+        except Exception as e:
+            if jwks_raw is None:
+                raise  # Nothing cached yet: cannot validate anything
+            logger.warning(f"JWKS refresh failed, serving cached keys: {e}")
+            _jwks = (jwks_raw, keys, time.time() - JWKS_TTL + JWKS_MIN_REFRESH_INTERVAL)  # Retry soon
+        return jwks_raw, keys
+
+# --- Verified-claims cache ---
+# Key: blake2b digest of the raw token (the token itself is never kept); value: (claims, expires_at).
+# Entries live at most CLAIMS_CACHE_TTL seconds and never outlive the token's own `exp`.
+CLAIMS_CACHE_TTL = 60
+_claims_cache: TTLCache = TTLCache(maxsize=50_000, ttl=CLAIMS_CACHE_TTL)
+_claims_lock = threading.Lock()  # TTLCache is not thread-safe (decode may run in the threadpool)
+
+def _claims_cache_key(token: str) -> bytes:
+    return blake2b(token.encode(), digest_size=16).digest()
+
+def get_cached_claims(token: str):
+    """Returns the cached, still-valid claims for `token`, or None (pure in-memory lookup, never blocks on I/O)."""
+    with _claims_lock:
+        cached = _claims_cache.get(_claims_cache_key(token))
+    if cached and time.time() < cached[1]:
+        return cached[0]
+    return None
 
 def decode_supabase_token(token: str):
     """
     Decodes and verifies a JWT token issued by Supabase using the project's JWKS.
+    - Returns cached claims for a token verified in the last 60s (and not yet expired).
     - Uses the cached JWKS public keys.
     - Disables audience ('aud') check for compatibility (adjust if needed).
     - Uses ES256 algorithm for ECC keys (modern Supabase).
     """
-    jwks = get_supabase_jwks()
+    cached = get_cached_claims(token)
+    if cached is not None:
+        return cached  # Already verified: skip the signature check
+
+    now = time.time()
+    _, keys = get_supabase_jwks()
     try:
-        return jwt.decode(
+        # O(1) lookup of the pre-parsed public key by `kid` (no per-request JWK parsing)
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = keys.get(kid)
+        if public_key is None:
+            # Possibly a freshly rotated key: refresh the JWKS once before rejecting
+            _, keys = get_supabase_jwks(force_refresh=True)
+            public_key = keys.get(kid)
+        if public_key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key id: {kid}")
+        payload = jwt.decode(
             token,
-            jwks,
+            public_key,
             algorithms=["ES256"],  # Supabase now uses ECC (P-256)
             options={"verify_aud": False}
         )
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Invalid Supabase token: {str(e)}")
+    except jwt.PyJWTError as e:
+        # Generic detail: never echo parser/verifier internals back to the caller
+        raise HTTPException(status_code=401, detail="Invalid Supabase token.") from e
 
-async def get_current_user(authorization: str = Header(...)):
+    expires_at = min(payload.get("exp", now), now + CLAIMS_CACHE_TTL)
+    if expires_at > now:
+        with _claims_lock:
+            _claims_cache[_claims_cache_key(token)] = (payload, expires_at)
+    return payload
+
+async def get_current_user(request: Request, authorization: str = Header(...)):
     """
     FastAPI dependency for extracting and validating the logged-in user from Authorization header.
     - Expects: 'Authorization: Bearer <token>'
-    - Decodes the JWT and returns a dict with user_id, email, and role.
+    - Decodes the JWT and returns a dict with user_id, email, and role (verified claims only, no DB read).
     - Raises HTTP 401 for missing or invalid tokens.
+    - Once verified, sets request.state.rl_key so the rate limiter buckets on the user, not the IP.
     """
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer token")
 
-    token = authorization.split(" ")[1]
-    payload = decode_supabase_token(token)
+    token = authorization[7:]  # len("Bearer "): no list allocation from split()
+    payload = get_cached_claims(token)
+    if payload is None:
+        # Slow path (ES256 verify, maybe a JWKS fetch) is CPU/IO-bound: keep it off the event loop
+        payload = await run_in_threadpool(decode_supabase_token, token)
+    if payload.get("sub"):
+        request.state.rl_key = f"u:{payload['sub']}"  # Verified identity for @limiter.limit
 
     return {
         "user_id": payload.get("sub"),
@@ -64,6 +167,23 @@ async def get_current_user(authorization: str = Header(...)):
         "role": payload.get("role"),
     }
 
+async def resolve_username(user_id: Optional[str]) -> Optional[str]:
+    """
+    The user's username from public.users (get_user_by_id, TTL-cached), or None if there is no row.
+    Never taken from the token's user_metadata: end users can edit that.
+    """
+    if not user_id:
+        return None
+    user_row = await run_in_threadpool(get_user_by_id, user_id)
+    return user_row.get("username") if user_row else None
+
+async def get_current_username(user=Depends(get_current_user)) -> Optional[str]:
+    """
+    FastAPI dependency for routes that check ownership by username (user-metadata).
+    Kept out of get_current_user so other routes don't pay for the users lookup.
+    """
+    return await resolve_username(user["user_id"])
+
 """
 ----------------------------------------------------------
 📝 Implementation Notes & Troubleshooting
@@ -75,6 +195,7 @@ async def get_current_user(authorization: str = Header(...)):
 2. JWT Algorithm:
    - Supabase migrated to ES256 (ECC, P-256) by default. Use 'algorithms=["ES256"]'.
    - Do NOT use RS256 unless your project explicitly uses RSA keys.
+   - Verification uses PyJWT + cryptography (OpenSSL P-256), with the key selected by the token's `kid`.
 
 3. JWKS API key:
    - Supabase requires the 'apikey' header on almost all endpoints, including JWKS.
@@ -84,10 +205,18 @@ async def get_current_user(authorization: str = Header(...)):
    - The 'sub' field is the user ID (UUID).
    - The 'email' claim is only present if email is verified/available.
    - The 'role' claim reflects the user's auth role (usually 'authenticated').
+   - get_current_user returns verified claims only. Routes that need the username use
+     get_current_username (or resolve_username), which read public.users by user id (cached),
+     never 'user_metadata': the user can change that client-side. None when there is no users row.
 
-5. Caching:
-   - @lru_cache caches the public key set for the process lifetime (improves perf).
-   - If you rotate keys, restart your backend or clear the cache.
+5. Caching & concurrency:
+   - The parsed key set is cached for 5 minutes (JWKS_TTL) and then re-fetched.
+   - A token with an unknown `kid` (key rotation) forces one refresh before the 401; no restart needed.
+   - If Supabase is unreachable during a refresh, the last known keys keep being used.
+   - Verified claims are cached per token (blake2b digest) for min(exp - now, 60s),
+     so polling dashboards do not re-verify the ES256 signature on every request.
+   - Cache hits are served inline; misses (signature check + first JWKS download)
+     run in the threadpool so concurrent authenticated requests never stall the event loop.
 
 6. Security:
    - Always verify tokens using your project's real JWKS.
@@ -116,7 +245,7 @@ Reusable FastAPI dependency for validating and extracting user identity from Sup
 - All routes requiring authentication, via: `Depends(get_current_user)`
 
 🧠 Good Practices:
-- Use @lru_cache for caching the JWKS (saves requests, boosts perf).
+- Cache the JWKS with a TTL (saves requests, boosts perf, still picks up key rotation).
 - Always check the structure and claims of decoded payload.
 - For stricter security, verify the audience claim (if you set one).
 
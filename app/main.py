@@ -9,8 +9,8 @@ Purpose:
     Ensures security, scalability, and clarity for maintenance.
 
 What It Does:
-    - Initializes FastAPI app.
-    - Attaches middleware for CORS, rate limiting, and error handling.
+    - Initializes FastAPI app (lifespan: Qdrant collection check at startup, extraction pool shutdown).
+    - Attaches middleware for CORS and error handling.
     - Registers all API routers (auth, profile, agent, health, etc).
     - Restricts CORS to frontend URL.
     - Provides a health root endpoint.
@@ -22,7 +22,7 @@ Used By:
 Good Practice:
     - Only import and include routers that exist in codebase.
     - All services and logic in separate service/util files.
-    - Rate limiting and error handlers enabled.
+    - Rate limiting (Redis-backed, shared by all workers) and error handlers enabled.
     - Each section is well-commented for maintainers.
 
 --------------------------------------------------------------------
@@ -31,13 +31,12 @@ Good Practice:
 from app.core.logging import init_logging
 init_logging()
 
-from fastapi import FastAPI, Request
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
 
 # === Import Routers Based on Current Structure ===
 
@@ -60,27 +59,34 @@ from app.routes.agent import router as agent_router
 from app.routes.health import router as health_router
 
 from app.core.config import settings
+from app.services.vectorstore import ensure_collection_exists
+from app.core.process_pool import shutdown_extraction_pool
+
+logger = logging.getLogger(__name__)
+
+# === Lifespan (startup/shutdown) ===
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Check the Qdrant collection once at startup so the first vector request never pays for it.
+    # If Qdrant is unreachable, keep booting: the first vector op retries the check.
+    try:
+        await run_in_threadpool(ensure_collection_exists)
+    except Exception as e:
+        logger.warning(f"Qdrant collection check failed at startup, will retry on first use: {e}")
+    yield
+    shutdown_extraction_pool()  # Stop text-extraction worker processes
 
 # === FastAPI App Initialization ===
 app = FastAPI(
     title="AgereOne Backend",
     description="Backend API for AgereOne AI Career Agent SaaS.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# === Rate Limiting Middleware ===
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-
-@app.exception_handler(RateLimitExceeded)
-async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    """Handles requests exceeding rate limits."""
-    return JSONResponse(
-        status_code=429,
-        content={"detail": "Too many requests. Please slow down."},
-    )
-
-app.add_middleware(SlowAPIMiddleware)
+# === Rate Limiting ===
+# Enforced per route by @limiter.limit (app/core/limiter.py, Redis-backed token bucket).
+# Rejected requests raise HTTPException(429), handled by FastAPI's default handler.
 
 # === CORS Middleware ===
 app.add_middleware(
@@ -115,7 +121,7 @@ app.include_router(health_router,             prefix="/api",         tags=["heal
 
 # === Root Endpoint ===
 @app.get("/")
-def read_root():
+async def read_root():
     """Basic health/status endpoint."""
     return {"status": "AgereOne backend running."}
 
@@ -125,12 +131,17 @@ Security & Scalability Notes:
     - All endpoints are protected by per-route rate limiting.
     - CORS policy is restricted for API security.
     - Each router is modular for easier testing and maintenance.
+    - Handlers with no blocking I/O are `async def` (no threadpool hop); blocking SDK calls inside
+      async handlers are offloaded with run_in_threadpool.
     - You can add more routers simply by adding their import/include lines.
     - Suitable for Railway, Docker, and serverless Python deployments.
 
 Deployment:
     - Run: uvicorn app.main:app --reload  (dev)
-    - Run: uvicorn app.main:app --host 0.0.0.0 --port 8000  (prod/Railway)
+    - Run: uvicorn app.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools  (prod/Railway)
+    - uvloop + httptools ship with uvicorn[standard] (libuv event loop, C HTTP parser).
+    - Workers: uvicorn reads WEB_CONCURRENCY (default 1); set it to ~CPU cores on the service.
+      Rate limits live in Redis, so they hold across workers; in-process TTL caches are per worker.
 
 --------------------------------------------------------------------
 """
@@ -1,7 +1,11 @@
 # app/routes/agent.py ** NEW
 
+import asyncio
+import json
 import logging
+from hashlib import blake2b
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from app.services.supabase import (
@@ -9,23 +13,97 @@ from app.services.supabase import (
     get_openai_key_and_model_for_user
 )
 from app.services.vectorstore import query_profile_vectors
-from app.deps.supabase_auth import get_current_user
+from app.services.cache import ttl_cached
+from app.deps.supabase_auth import get_current_user, resolve_username
 from app.core.limiter import limiter
-from app.core.config import settings
+from app.core.config import RATE_LIMIT_CHAT, RATE_LIMIT_CHAT_STREAM
 from app.utils.agent import ask_openai_agent, ask_openai_agent_stream  # Both helpers
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Server-Sent Events framing, encoded once: each event is "data: <json>\n\n"
+SSE_PREFIX = b"data: "
+SSE_SUFFIX = b"\n\n"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Stop nginx/Railway proxies from buffering the stream
+}
+
 class ChatRequest(BaseModel):
     messages: list
     username: str = None  # Optional, for public AI profile/chat
 
+@ttl_cached(
+    "chat_context",
+    # The active profile id doubles as a version: a new upload creates a new profile row,
+    # so stale context is never served after re-uploading (and deleted profiles 404 before this).
+    key=lambda user_id, profile_id, query, **_: (user_id, profile_id, blake2b(query.encode(), digest_size=16).digest()),
+    ttl=60,
+    maxsize=1024,
+    cache_if=bool,  # Never cache an empty context (failed embedding / no hits)
+)
+async def _build_context(user_id: str, profile_id, query: str, openai_key: str, model: str = None) -> str:
+    """Semantic search + join of the top chunks into the prompt context (cached per profile version and question)."""
+    context_chunks = await query_profile_vectors(
+        user_id, query, openai_key=openai_key, model=model, top_k=6,
+        cache_scope=profile_id,  # Paraphrases of a recent question reuse its hits for the same profile version
+    )
+    return "\n".join([c["text"] for c in context_chunks])
+
+async def _resolve_chat_context(data: ChatRequest, user: dict):
+    """
+    Shared by /chat and /chat/stream: resolves the target profile, the owner's OpenAI key/model
+    and the Qdrant semantic context. Independent lookups run concurrently.
+    Returns (openai_key, openai_model, full_context).
+    """
+    if data.username:
+        # Public profile chat: the owner's user_id is only known once the profile is found
+        profile = await run_in_threadpool(get_user_profile_by_username, data.username)
+        if not profile:
+            raise HTTPException(status_code=404, detail="User profile not found or not published.")
+        user_id = profile["user_id"]
+        openai_key, openai_model = await run_in_threadpool(get_openai_key_and_model_for_user, user_id)
+    else:
+        # Own profile: user_id comes from the token, so the key lookup runs alongside username -> profile
+        user_id = user["user_id"]
+
+        async def own_profile():
+            username = await resolve_username(user_id)  # public.users, TTL-cached
+            if not username:
+                return None
+            return await run_in_threadpool(get_user_profile_by_username, username)
+
+        profile, (openai_key, openai_model) = await asyncio.gather(
+            own_profile(),
+            run_in_threadpool(get_openai_key_and_model_for_user, user_id),
+        )
+        if not profile:
+            raise HTTPException(status_code=404, detail="Active profile not found for user.")
+
+    if not openai_key:
+        raise HTTPException(status_code=400, detail="No OpenAI key found for this user.")
+
+    # Qdrant semantic context (needs the key to embed the query); repeat questions skip Qdrant
+    try:
+        full_context = await _build_context(
+            user_id,
+            profile.get("id"),
+            data.messages[-1]["content"],
+            openai_key=openai_key,
+            model=profile.get("embedding_model"),  # Query with the model the profile was embedded with
+        )
+    except Exception as e:
+        logger.error(f"Qdrant semantic search failed for user_id {user_id}: {e}", exc_info=True)
+        full_context = ""
+
+    return openai_key, openai_model, full_context
+
 # -----------------------------
 # Standard AI Chat Endpoint
 # -----------------------------
 @router.post("/chat")
-@limiter.limit(settings.RATE_LIMIT_CHAT)
+@limiter.limit(RATE_LIMIT_CHAT)
 async def agent_chat(
     request: Request,
     data: ChatRequest,
@@ -35,35 +113,11 @@ async def agent_chat(
     AI Career Chat endpoint (single reply, not streaming).
     """
     try:
-        # Resolve user_id and profile (internal or public)
-        if data.username:
-            # Public profile chat
-            profile = get_user_profile_by_username(data.username)
-            if not profile:
-                raise HTTPException(status_code=404, detail="User profile not found or not published.")
-            user_id = profile["user_id"]
-        else:
-            user_id = user["user_id"]
-            profile = get_user_profile_by_username(user["username"])
-            if not profile:
-                raise HTTPException(status_code=404, detail="Active profile not found for user.")
-
-        # Fetch OpenAI key and model
-        openai_key, openai_model = get_openai_key_and_model_for_user(user_id)
-        if not openai_key:
-            raise HTTPException(status_code=400, detail="No OpenAI key found for this user.")
-
-        # Qdrant semantic context
-        try:
-            context_chunks = query_profile_vectors(user_id, data.messages[-1]["content"], top_k=6)
-        except Exception as e:
-            logger.error(f"Qdrant semantic search failed for user_id {user_id}: {e}", exc_info=True)
-            context_chunks = []
-
-        full_context = "\n".join([c["text"] for c in context_chunks])
-
-        # Call OpenAI
-        ai_reply = ask_openai_agent(
+        openai_key, openai_model, full_context = await _resolve_chat_context(data, user)
+
+        # Call OpenAI (blocking HTTP request: run in the threadpool)
+        ai_reply = await run_in_threadpool(
+            ask_openai_agent,
             api_key=openai_key,
             model=openai_model,
             system_prompt="You are an expert career advisor based on the user's profile.",
@@ -83,7 +137,7 @@ async def agent_chat(
 # Streaming AI Chat Endpoint
 # -----------------------------
 @router.post("/chat/stream")
-@limiter.limit(settings.RATE_LIMIT_CHAT_STREAM)
+@limiter.limit(RATE_LIMIT_CHAT_STREAM)
 async def agent_chat_stream(
     request: Request,
     data: ChatRequest,
@@ -93,48 +147,25 @@ async def agent_chat_stream(
     AI Career Chat (streaming reply).
     """
     try:
-        # Resolve user_id and profile (internal or public)
-        if data.username:
-            profile = get_user_profile_by_username(data.username)
-            if not profile:
-                raise HTTPException(status_code=404, detail="User profile not found or not published.")
-            user_id = profile["user_id"]
-        else:
-            user_id = user["user_id"]
-            profile = get_user_profile_by_username(user["username"])
-            if not profile:
-                raise HTTPException(status_code=404, detail="Active profile not found for user.")
-
-        # Fetch OpenAI key and model
-        openai_key, openai_model = get_openai_key_and_model_for_user(user_id)
-        if not openai_key:
-            raise HTTPException(status_code=400, detail="No OpenAI key found for this user.")
-
-        # Qdrant semantic context
-        try:
-            context_chunks = query_profile_vectors(user_id, data.messages[-1]["content"], top_k=6)
-        except Exception as e:
-            logger.error(f"Qdrant semantic search failed for user_id {user_id}: {e}", exc_info=True)
-            context_chunks = []
-
-        full_context = "\n".join([c["text"] for c in context_chunks])
-
-        # Streaming response from OpenAI
-        def stream():
+        openai_key, openai_model, full_context = await _resolve_chat_context(data, user)
+
+        # Streaming response from OpenAI (async generator: no threadpool slot held per open stream)
+        # Each event is one JSON object, {"token": "..."} or {"error": "..."}, so newlines stay escaped
+        async def stream():
             try:
-                for chunk in ask_openai_agent_stream(
+                async for chunk in ask_openai_agent_stream(
                     api_key=openai_key,
                     model=openai_model,
                     system_prompt="You are an expert career advisor based on the user's profile.",
                     context=full_context,
                     messages=data.messages
                 ):
-                    yield f"data: {chunk}\n"
+                    yield SSE_PREFIX + json.dumps({"token": chunk}).encode("utf-8") + SSE_SUFFIX
             except Exception as e:
                 logger.error(f"Streaming error: {e}", exc_info=True)
-                yield "data: Error streaming from OpenAI\n"
+                yield SSE_PREFIX + json.dumps({"error": "Error streaming from OpenAI"}).encode("utf-8") + SSE_SUFFIX
 
-        return StreamingResponse(stream(), media_type="text/event-stream")
+        return StreamingResponse(stream(), media_type="text/event-stream", headers=SSE_HEADERS)
 
     except HTTPException as e:
         raise e
@@ -161,7 +192,13 @@ Used By:
 
 Good Practice:
     - Streaming uses Server-Sent Events (SSE), easy for Next.js and React
+      (spec-compliant "data: {json}\\n\\n" events with {"token"} / {"error"} payloads,
+      no-cache, proxy buffering disabled; the OpenAI stream is read with AsyncOpenAI)
     - Rate-limited, fully logged, no secrets exposed
+    - Blocking Supabase and OpenAI (single reply) calls run in the threadpool; Qdrant search and
+      the OpenAI stream are async (the event loop is never blocked)
+    - Joined context is TTL-cached per (user, active profile, question) for 60s; near-duplicate
+      questions reuse recent search hits (semantic cache in vectorstore.py)
     - Handles all errors gracefully, logs for ops
 
 Security & Scalability:
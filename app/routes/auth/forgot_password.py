@@ -2,18 +2,16 @@
 
 import logging
 from fastapi import APIRouter, Form, HTTPException, Request
-from app.core.config import settings
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings, RATE_LIMIT_FORGOT_PASSWORD
 from app.core.limiter import limiter
-from supabase import create_client
+from app.core.supabase_client import get_supabase  # Shared ANON-key client (public operations)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Initialize the Supabase client with the ANON key (for public operations)
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
-
 @router.post("/forgot-password")
-@limiter.limit(settings.RATE_LIMIT_FORGOT_PASSWORD)
+@limiter.limit(RATE_LIMIT_FORGOT_PASSWORD)
 async def forgot_password(request: Request, email: str = Form(...)):
     """
     Initiates password reset by sending a password reset email via Supabase Auth.
@@ -22,13 +20,12 @@ async def forgot_password(request: Request, email: str = Form(...)):
 
     redirect_url = f"{settings.FRONTEND_URL}/reset"
     try:
-        response = supabase.auth.reset_password_email(email, redirect_to=redirect_url)
-        if response is None:
-            logger.info(f"Password reset email sent to: {email}")
-            return {"message": "Password reset email sent."}
-        else:
-            logger.warning(f"Unexpected response from Supabase when resetting password for: {email}")
-            raise HTTPException(status_code=400, detail="Failed to send reset email.")
+        # Sync SDK call: run it off the event loop. It returns None and raises on failure.
+        await run_in_threadpool(
+            get_supabase().auth.reset_password_email, email, {"redirect_to": redirect_url}
+        )
+        logger.info(f"Password reset email sent to: {email}")
+        return {"message": "Password reset email sent."}
     except Exception as e:
         logger.error(f"Error sending password reset email to {email}: {e}", exc_info=True)
         # Never reveal details to client
@@ -2,18 +2,19 @@
 
 import logging
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from supabase import create_client
-from app.core.config import settings
+from supabase import AuthApiError
+from app.core.config import RATE_LIMIT_LOGIN
 from app.core.limiter import limiter
+from app.core.supabase_client import get_supabase
+from app.services.supabase import get_user_by_id
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
-
 @router.post("/login")
-@limiter.limit(settings.RATE_LIMIT_LOGIN)
+@limiter.limit(RATE_LIMIT_LOGIN)
 async def login_user(request: Request):
     """
     Authenticates a user using Supabase Auth (email/password).
@@ -31,8 +32,15 @@ async def login_user(request: Request):
             logger.warning(f"Missing email or password in login request: {data}")
             raise HTTPException(status_code=400, detail="Email and password required.")
 
-        # Authenticate with Supabase Auth
-        response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        # Authenticate with Supabase Auth (sync SDK call: run it off the event loop)
+        try:
+            response = await run_in_threadpool(
+                get_supabase().auth.sign_in_with_password, {"email": email, "password": password}
+            )
+        except AuthApiError as e:
+            # GoTrue answers bad credentials with a 400 "invalid_credentials" error
+            logger.warning(f"Invalid credentials for email: {email} ({e.code})")
+            raise HTTPException(status_code=401, detail="Invalid credentials.")
 
         # If authentication fails, Supabase returns user=None
         if response.user is None:
@@ -41,16 +49,19 @@ async def login_user(request: Request):
 
         user_id = response.user.id
 
-        # Fetch the username from your custom users table
-        user_response = supabase.table("users").select("username").eq("id", user_id).single().execute()
-        if not user_response.data or "username" not in user_response.data:
+        # Username always comes from public.users, the same source the ownership checks use
+        # (get_current_username): user_metadata is editable by the user, so it is never trusted.
+        # Service client, TTL-cached; the shared ANON client is never used for table reads.
+        user_row = await run_in_threadpool(get_user_by_id, str(user_id))
+        username = user_row.get("username") if user_row else None
+        if not username:
             logger.error(f"Username not found for user_id: {user_id}")
             raise HTTPException(status_code=404, detail="Username not found.")
 
-        logger.info(f"Login successful for email: {email} (username: {user_response.data['username']})")
+        logger.info(f"Login successful for email: {email} (username: {username})")
 
         return JSONResponse({
-            "username": user_response.data["username"],
+            "username": username,
             "access_token": response.session.access_token,
             "refresh_token": response.session.refresh_token,
             "expires_in": response.session.expires_in,
@@ -70,7 +81,7 @@ Purpose:
 What It Does:
     - Accepts email/password in POST body (JSON).
     - Calls Supabase Auth to sign in.
-    - On success, looks up the user's username (for dashboard/profile use).
+    - On success, returns the user's username from public.users (cached get_user_by_id, never user_metadata).
     - Returns the username and token info in a JSON response.
 
 Used By:
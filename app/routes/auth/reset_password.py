@@ -1,19 +1,46 @@
 # app/routes/auth/reset_password.py ** NEW
 
 import logging
+import httpx
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-from supabase import create_client
-from app.core.config import settings
+from supabase_auth import SyncGoTrueClient
+from supabase_auth.errors import AuthError
+from app.core.config import settings, RATE_LIMIT_RESET_PASSWORD
 from app.core.limiter import limiter
+from app.deps.supabase_auth import decode_supabase_token
+from app.utils.validators import is_strong_password
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+def _is_recovery_token(claims: dict) -> bool:
+    """True if the session was created from a password recovery link (`amr` method "recovery")."""
+    return any(
+        (m.get("method") if isinstance(m, dict) else m) == "recovery"
+        for m in claims.get("amr") or []
+    )
+
+def _update_password_as_user(access_token: str, new_password: str):
+    """
+    Sets the password through GoTrue's user endpoint (PUT /user) with the user's own token, like
+    supabase-js updateUser() after a recovery link: GoTrue applies its own checks, no service-role escalation.
+    A throwaway ANON-key auth client holds the session, so no session is ever shared between requests.
+    """
+    with httpx.Client(timeout=10) as http_client:
+        auth = SyncGoTrueClient(
+            url=f"{settings.SUPABASE_URL}/auth/v1",
+            headers={"apikey": settings.SUPABASE_ANON_KEY},
+            auto_refresh_token=False,
+            persist_session=False,
+            http_client=http_client,
+        )
+        auth.set_session(access_token, "")  # Unexpired token: no refresh token needed
+        return auth.update_user({"password": new_password})
 
 @router.post("/reset-password")
-@limiter.limit(settings.RATE_LIMIT_RESET_PASSWORD)
+@limiter.limit(RATE_LIMIT_RESET_PASSWORD)
 async def reset_password(request: Request):
     """
     Completes password reset using the Supabase recovery token and new password.
@@ -36,7 +63,29 @@ async def reset_password(request: Request):
             logger.warning("Reset attempt with missing token or password.")
             raise HTTPException(status_code=400, detail="Token and new password are required.")
 
-        response = supabase.auth.update_user(access_token=token, password=new_password)
+        # Same policy as /register
+        if not is_strong_password(new_password):
+            logger.warning("Password reset rejected—weak password.")
+            raise HTTPException(
+                status_code=400,
+                detail="Password must be 8-128 characters, with uppercase, lowercase, a number, and a special character."
+            )
+
+        # The recovery token is a Supabase access token: verify it locally (JWKS, claims cache) and
+        # require that it came from a recovery email, so a normal session token cannot reset the password.
+        try:
+            claims = await run_in_threadpool(decode_supabase_token, token)
+        except HTTPException:
+            claims = {}
+        if not claims.get("sub") or not _is_recovery_token(claims):
+            logger.warning("Password reset failed—invalid, expired or non-recovery token.")
+            raise HTTPException(status_code=400, detail="Password reset failed.")
+
+        try:
+            response = await run_in_threadpool(_update_password_as_user, token, new_password)
+        except AuthError as e:
+            logger.warning(f"Password reset rejected by Supabase Auth: {e}")
+            raise HTTPException(status_code=400, detail="Password reset failed.")
         if response.user is None:
             logger.warning("Password reset failed—invalid or expired token.")
             raise HTTPException(status_code=400, detail="Password reset failed.")
@@ -56,7 +105,8 @@ Purpose:
 
 What It Does:
     - Accepts a POST with JSON containing `token` (from reset email) and `password`.
-    - Calls Supabase Auth API to update the password for the user associated with that token.
+    - Verifies the token (same JWKS check as get_current_user), requires a recovery session (`amr`),
+      checks the password policy, then updates the password as that user (GoTrue PUT /user, user-scoped).
     - Returns a generic success or failure message.
 
 Used By:
@@ -65,7 +115,8 @@ Used By:
 Good Practice:
     - Rate limits the endpoint (to 5/hour/IP by default).
     - Never leaks sensitive error messages to clients.
-    - Always validates both token and password are present.
+    - Always validates both token and password are present, and the password strength (as /register).
+    - No service-role Admin API: the change goes through the user's own recovery session.
 
 Security & Scalability:
     - Responds generically to avoid revealing user existence.
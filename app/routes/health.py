@@ -5,7 +5,7 @@ from fastapi import APIRouter
 router = APIRouter()
 
 @router.get("/health")
-def health_check():
+async def health_check():
     """
     Simple health check endpoint.
 
@@ -30,6 +30,8 @@ Provides a lightweight endpoint to verify the API is up and responsive.
 
 🧠 Good Practices:
 - Keep this endpoint fast and side-effect free (no DB or external calls).
+- `async def` on purpose: runs inline on the event loop (no threadpool hop) and carries no @limiter.limit,
+  so probes never touch Redis and can never be throttled with a 429.
 - Never require authentication for `/health`.
 - Should always return 200 (unless the server is truly down).
 
@@ -1,18 +1,21 @@
 # app/routes/profile/delete.py ** New
 
+import asyncio
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
-from app.deps.supabase_auth import get_current_user
-from app.services.supabase import soft_delete_active_profile
+from fastapi.concurrency import run_in_threadpool
+from app.deps.supabase_auth import get_current_user, resolve_username
+from app.services import cache
+from app.services.supabase import soft_delete_active_profile, invalidate_profile_by_username
 from app.services.vectorstore import delete_user_vectors
 from app.core.limiter import limiter
-from app.core.config import settings
+from app.core.config import RATE_LIMIT_DELETE_PROFILE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.delete("/delete")
-@limiter.limit(settings.RATE_LIMIT_DELETE_PROFILE)
+@limiter.limit(RATE_LIMIT_DELETE_PROFILE)
 async def delete_profile(
     request: Request,
     user=Depends(get_current_user),
@@ -26,16 +29,24 @@ async def delete_profile(
     logger.info(f"User {user_id} requested profile delete.")
 
     try:
-        # Soft delete active profile (Supabase)
-        rows_deleted = soft_delete_active_profile(user_id)
+        # Soft delete active profile (Supabase) and delete vectors (Qdrant) concurrently.
+        # The vector delete is idempotent, so it is safe to run even if no profile was active.
+        # The username (for the profile cache key) is resolved alongside, so it adds no latency.
+        rows_deleted, _, username = await asyncio.gather(
+            run_in_threadpool(soft_delete_active_profile, user_id),
+            run_in_threadpool(delete_user_vectors, user_id),
+            resolve_username(user_id),
+        )
+        cache.invalidate(f"settings:{user_id}")
+        invalidate_profile_by_username(username)
+
         if not rows_deleted:
             logger.warning(f"No active profile found to delete for user_id {user_id}")
             raise HTTPException(status_code=404, detail="No active profile found.")
-
-        # Delete vectors from Qdrant
-        delete_user_vectors(user_id)
         logger.info(f"Deleted profile and vectors for user_id {user_id}")
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting profile for user_id {user_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete profile.")
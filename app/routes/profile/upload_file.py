@@ -1,27 +1,75 @@
 # app/routes/profile/upload_file.py ** NEW
 
 import logging
-from fastapi import APIRouter, UploadFile, HTTPException, Depends, Request, Form
-from app.utils.text_extraction import extract_text_from_file
-from app.services.vectorstore import delete_user_vectors, store_profile_vectors
+import os
+import tempfile
+from fastapi import APIRouter, BackgroundTasks, UploadFile, HTTPException, Depends, Request, Form
+from fastapi.concurrency import run_in_threadpool
+from app.utils.text_extraction import ALLOWED_EXTENSIONS, extract_text_in_pool
+from app.services.vectorstore import store_profile_vectors
 from app.services.supabase import (
-    deactivate_user_profiles,
+    deactivate_profiles_and_get_openai_key,
     insert_user_profile_metadata,
-    get_openai_key_and_model_for_user,
     get_user_profile_history,
+    invalidate_profile_by_username,
+    get_user_by_id,
 )
 from app.deps.supabase_auth import get_current_user
+from app.services import cache
 from app.core.limiter import limiter
-from app.core.config import settings
+from app.core.config import settings, RATE_LIMIT_UPLOAD_FILE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+UPLOAD_READ_CHUNK = 64 * 1024  # Bytes copied per read while spooling the upload to disk
+
+async def _spool_upload(file: UploadFile, max_bytes: int) -> str:
+    """
+    Copies the upload to a named temp file in fixed-size chunks (bounded memory).
+    Aborts with 413 as soon as the size exceeds `max_bytes`. Returns the temp file path (caller deletes it).
+    """
+    if file.size is not None and file.size > max_bytes:
+        # Size known from the parsed form: reject before copying a single byte
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+        )
+    suffix = os.path.splitext(file.filename)[1].lower()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    size = 0
+    try:
+        with tmp:
+            while chunk := await file.read(UPLOAD_READ_CHUNK):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+                    )
+                tmp.write(chunk)
+    except BaseException:
+        os.unlink(tmp.name)
+        raise
+    logger.info(f"Spooled {size} bytes from uploaded file {file.filename} to disk")
+    return tmp.name
+
+def _record_upload(user_id: str, metadata: dict):
+    """Background task: inserts the profile metadata row, then drops the caches that depend on it."""
+    try:
+        insert_user_profile_metadata(user_id=user_id, **metadata)
+        logger.info(f"New profile metadata inserted for user_id {user_id}")
+    finally:
+        cache.invalidate(f"settings:{user_id}")
+        user_row = get_user_by_id(user_id)  # TTL-cached; off the request path
+        invalidate_profile_by_username(user_row.get("username") if user_row else None)
+
 @router.post("/upload-file")
-@limiter.limit(settings.RATE_LIMIT_UPLOAD_FILE)
+@limiter.limit(RATE_LIMIT_UPLOAD_FILE)
 async def upload_profile(
     request: Request,
     file: UploadFile,
+    background_tasks: BackgroundTasks,
     chunk_size: int = Form(None),  # for advanced users, else use default
     chunk_overlap: int = Form(None),  # for advanced users, else use default
     user=Depends(get_current_user),
@@ -36,27 +84,31 @@ async def upload_profile(
     """
     logger.info(f"User '{user.get('email', '')}' ({user.get('user_id', '')}) uploading file: {file.filename}")
 
-    # 1. Validate file type
-    if not file.filename.endswith((".pdf", ".txt", ".md")):
+    # 1. Validate file type (case-insensitive; fails before any byte is copied)
+    if not (file.filename or "").lower().endswith(ALLOWED_EXTENSIONS):
         logger.warning(f"File {file.filename} rejected: unsupported type")
         raise HTTPException(
             status_code=400,
             detail="Only PDF, TXT, or Markdown (.md) files are allowed."
         )
 
-    # 2. Read and extract text
-    contents = await file.read()
-    logger.info(f"Read {len(contents)} bytes from uploaded file {file.filename}")
-
+    # 2. Stream to a temp file (size-capped), then extract text from the path
+    tmp_path = await _spool_upload(file, settings.MAX_UPLOAD_BYTES)
     try:
-        text = extract_text_from_file(contents, file.filename)
+        # CPU-bound for PDFs: run in worker processes (outside the GIL), page ranges in parallel for large PDFs
+        text = await extract_text_in_pool(tmp_path, file.filename)
         logger.info(f"Extracted {len(text)} characters from file {file.filename}")
+    except ValueError as e:
+        # Unusable content (not UTF-8 text, or a scanned PDF without a text layer)
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to extract text from {file.filename}: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to extract text: {str(e)}"
         )
+    finally:
+        os.unlink(tmp_path)
 
     if not text.strip():
         logger.warning(f"No text found in the uploaded file: {file.filename}")
@@ -67,8 +119,8 @@ async def upload_profile(
 
     user_id = user["user_id"]
 
-    # 3. Check OpenAI key and model
-    openai_key, embedding_model = get_openai_key_and_model_for_user(user_id)
+    # 3. Check OpenAI key and model; the same RPC marks all old profiles inactive (only if a key exists)
+    openai_key, embedding_model, _ = await run_in_threadpool(deactivate_profiles_and_get_openai_key, user_id)
     if not openai_key:
         logger.error(f"No OpenAI key configured for user_id {user_id}")
         raise HTTPException(
@@ -85,32 +137,29 @@ async def upload_profile(
     logger.info(f"Chunk settings: size={_chunk_size}, overlap={_chunk_overlap}")
 
     try:
-        # 5. Mark all old profiles inactive in Supabase (history only)
-        deactivate_user_profiles(user_id)
-        logger.info(f"All previous profiles deactivated for user_id {user_id}")
-
-        # 6. Delete all Qdrant vectors for this user
-        delete_user_vectors(user_id)
-        logger.info(f"All previous vectors deleted from Qdrant for user_id {user_id}")
-
-        # 7. Chunk, embed, store vectors (Qdrant)
-        vector_count = store_profile_vectors(
+        # 5-7. Chunk, embed (OpenAI) and store (Qdrant) as one pipeline: upserts start with the first batch.
+        # Point ids are deterministic per (user_id, chunk_idx), so the new vectors overwrite the old
+        # ones in place; only chunks beyond the new count are pruned, concurrently with the pipeline.
+        # Always pruned: a failed earlier upload can leave vectors behind without any active profile row.
+        vector_count = await store_profile_vectors(
             user_id, text, openai_key=openai_key, model=embedding_model,
-            chunk_size=_chunk_size, chunk_overlap=_chunk_overlap
+            chunk_size=_chunk_size, chunk_overlap=_chunk_overlap,
         )
         logger.info(f"{vector_count} vectors embedded and stored for user_id {user_id}")
 
-        # 8. Insert metadata row in Supabase
-        insert_user_profile_metadata(
-            user_id=user_id,
-            file_name=file.filename,
-            vector_count=vector_count,
-            model=embedding_model,
-            is_active=True,
-            chunk_size=_chunk_size,
-            chunk_overlap=_chunk_overlap
+        # 8. Insert metadata row in Supabase after the response is sent
+        background_tasks.add_task(
+            _record_upload,
+            user_id,
+            {
+                "file_name": file.filename,
+                "vector_count": vector_count,
+                "model": embedding_model,
+                "is_active": True,
+                "chunk_size": _chunk_size,
+                "chunk_overlap": _chunk_overlap,
+            },
         )
-        logger.info(f"New profile metadata inserted for user_id {user_id}")
 
     except Exception as e:
         logger.error(f"Embedding/upload error for user_id {user_id}: {e}", exc_info=True)
@@ -128,11 +177,13 @@ Purpose:
 
 What It Does:
     - Accepts PDF/TXT/MD uploads from authenticated users.
-    - Extracts text and validates file.
-    - Requires user to have an OpenAI API key configured.
-    - Marks all old profiles as inactive; deletes old vectors in Qdrant.
-    - Embeds the new profile using chunking (default or user-specified, advanced).
-    - Inserts new metadata row in Supabase with chunking info.
+    - Streams the upload to a temp file (MAX_UPLOAD_BYTES cap, 413 beyond), extracts text and validates file.
+    - Requires user to have an OpenAI API key configured; one RPC (deactivate_and_get_key) returns the key
+      and marks all old profiles as inactive.
+    - Embeds the new profile using chunking (default or user-specified, advanced) and streams the
+      vectors to Qdrant as batches are embedded, overwriting the old vectors in place (deterministic ids)
+      while pruning the leftover tail (always, since vectors can outlive a failed earlier upload).
+    - Inserts new metadata row in Supabase with chunking info (background task, after the response).
     - Only most recent upload is active (history is metadata only).
 
 Used By:
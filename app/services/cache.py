@@ -0,0 +1,175 @@
+# app/services/cache.py
+
+import inspect
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import numpy as np
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# In-process TTL caches (one per namespace)
+# -------------------------------------------------
+_caches: Dict[str, TTLCache] = {}
+_lock = threading.Lock()  # Service helpers are sync and may run in the threadpool
+
+def ttl_cached(
+    namespace: str,
+    key: Callable[..., Any],
+    ttl: int = 60,
+    maxsize: int = 10_000,
+    cache_if: Callable[[Any], bool] = lambda value: value is not None,
+):
+    """
+    Caches a function's result for `ttl` seconds under "<namespace>:<key(*args)>".
+    - `key` receives the function's arguments and returns the per-entry key (e.g. user_id).
+    - `cache_if` decides if a result is worth caching (by default, None/not-found is not cached).
+    Works on sync and `async def` functions; decorating both with the same namespace shares the entries.
+    Entries can be dropped early with invalidate("<namespace>:<key>").
+    """
+    cache = _caches.setdefault(namespace, TTLCache(maxsize=maxsize, ttl=ttl))
+    missing = object()
+
+    def lookup(entry_key):
+        with _lock:
+            return cache.get(entry_key, missing)
+
+    def store(entry_key, value):
+        if cache_if(value):
+            with _lock:
+                cache[entry_key] = value
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                entry_key = key(*args, **kwargs)
+                value = lookup(entry_key)
+                if value is missing:
+                    value = await func(*args, **kwargs)
+                    store(entry_key, value)
+                return value
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            entry_key = key(*args, **kwargs)
+            value = lookup(entry_key)
+            if value is missing:
+                value = func(*args, **kwargs)
+                store(entry_key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+def invalidate(cache_key: str):
+    """Drops one entry, e.g. invalidate(f"openai:{user_id}") after the key is updated."""
+    namespace, _, entry_key = cache_key.partition(":")
+    cache = _caches.get(namespace)
+    if cache is None:
+        return
+    with _lock:
+        cache.pop(entry_key, None)
+    logger.debug(f"Cache entry invalidated: {cache_key}")
+
+def clear(namespace: str):
+    """Drops every entry of a namespace."""
+    cache = _caches.get(namespace)
+    if cache is None:
+        return
+    with _lock:
+        cache.clear()
+
+# -------------------------------------------------
+# Semantic cache (nearest stored embedding instead of an exact key)
+# -------------------------------------------------
+class SemanticCache:
+    """
+    Caches values by embedding: a lookup hits when the cosine similarity between the query vector
+    and a stored vector is >= `threshold`, so paraphrased questions share one entry.
+    Entries are grouped per scope (e.g. user + profile version + model); a scope keeps its newest
+    `per_scope` unit vectors int8-quantized in one matrix (plus a float32 scale per row, 4x less memory
+    than float32), so a lookup is a single matrix-vector product.
+    Scopes expire `ttl` seconds after their last insert (TTL/LRU over `max_scopes`).
+    """
+
+    def __init__(self, threshold: float, per_scope: int = 64, max_scopes: int = 1024, ttl: int = 600):
+        self.threshold = threshold
+        self.per_scope = per_scope
+        self._scopes = TTLCache(maxsize=max_scopes, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    @staticmethod
+    def _quantize(unit: np.ndarray):
+        scale = float(np.abs(unit).max()) / 127 or 1.0
+        return np.round(unit / scale).astype(np.int8)[None, :], np.array([scale], dtype=np.float32)
+
+    def get(self, scope: Hashable, vector: List[float]) -> Optional[Any]:
+        """Value stored under the most similar vector of `scope`, or None below the threshold."""
+        with self._lock:
+            entry = self._scopes.get(scope)
+        if entry is None:
+            return None
+        matrix, scales, values = entry  # Immutable snapshot: scored outside the lock
+        scores = (matrix @ self._unit(vector)) * scales  # int8 rows promote to float32 in the product
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        logger.debug(f"Semantic cache hit (cosine {scores[best]:.3f})")
+        return values[best]
+
+    def put(self, scope: Hashable, vector: List[float], value: Any):
+        """Adds one entry to `scope`, evicting its oldest entry beyond `per_scope`."""
+        row, scale = self._quantize(self._unit(vector))
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None:
+                self._scopes[scope] = (row, scale, (value,))
+                return
+            matrix, scales, values = entry
+            keep = max(len(values) - self.per_scope + 1, 0)  # First index kept
+            self._scopes[scope] = (
+                np.vstack((matrix[keep:], row)),
+                np.concatenate((scales[keep:], scale)),
+                values[keep:] + (value,),
+            )
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Small TTL cache layer for hot, rarely-changing Supabase reads
+    (user rows, OpenAI key/model) so dashboard reloads skip the network.
+
+What It Does:
+    - @ttl_cached(namespace, key=...) memoizes a function (sync or async) per key for `ttl` seconds.
+    - invalidate("namespace:key") drops a single entry after a write.
+    - clear(namespace) drops a whole namespace.
+    - SemanticCache: per-scope nearest-embedding lookups (cosine >= threshold) for values whose
+      exact key rarely repeats, like free-text chat questions.
+
+Used By:
+    - app/services/supabase.py (get_user_by_id, get_openai_key_and_model_for_user)
+    - app/routes/agent.py (async chat context)
+    - app/utils/embeddings.py (query embeddings, keyed on a fingerprint of the OpenAI key)
+    - app/services/vectorstore.py (SemanticCache of chat search results)
+    - Routes that mutate cached data (update-key) to invalidate entries
+
+Good Practice:
+    - Always invalidate right after a successful write.
+    - Keep TTLs short: caches are per-process, so other workers converge within `ttl`.
+    - Never cache failures or not-found results (see `cache_if`).
+
+--------------------------------------------------------------------
+"""
@@ -3,7 +3,10 @@
 import logging
 from typing import Optional, Tuple, List, Dict, Any
 from app.core.config import settings
-from supabase import create_client, Client
+from app.core.supabase_client import pooled_http_client
+from supabase import create_client, Client, ClientOptions
+from app.services.cache import ttl_cached, invalidate, clear
+from app.utils.crypto import encrypt_secret, decrypt_secret, is_encrypted
 
 logger = logging.getLogger(__name__)
 
@@ -12,19 +15,23 @@ logger = logging.getLogger(__name__)
 # -----------------------------------------
 supabase: Client = create_client(
     settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_ROLE_KEY   # Use correct env var
+    settings.SUPABASE_SERVICE_ROLE_KEY,   # Use correct env var
+    options=ClientOptions(httpx_client=pooled_http_client()),  # Keep-alive pool (app/core/supabase_client.py)
 )
 
 # -------------------------------------------------
 # USER HELPERS
 # -------------------------------------------------
 
+# Columns the app reads from public.users (see handle_new_auth_user)
+USER_COLS = "id,email,first_name,last_name,username,plan,subdomain,profile_uploaded"
+
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """
     Fetches a user row by email.
     """
     try:
-        res = supabase.table("users").select("*").eq("email", email).single().execute()
+        res = supabase.table("users").select(USER_COLS).eq("email", email).single().execute()
         return res.data if res.data else None
     except Exception as e:
         logger.error(f"Error fetching user by email {email}: {e}", exc_info=True)
@@ -35,23 +42,37 @@ def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
     Fetches a user row by username.
     """
     try:
-        res = supabase.table("users").select("*").eq("username", username).single().execute()
+        res = supabase.table("users").select(USER_COLS).eq("username", username).single().execute()
         return res.data if res.data else None
     except Exception as e:
         logger.error(f"Error fetching user by username {username}: {e}", exc_info=True)
         return None
 
+@ttl_cached("user", key=lambda user_id: user_id)
 def get_user_by_id(user_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetches a user row by user_id.
     """
     try:
-        res = supabase.table("users").select("*").eq("id", user_id).single().execute()
+        res = supabase.table("users").select(USER_COLS).eq("id", user_id).single().execute()
         return res.data if res.data else None
     except Exception as e:
         logger.error(f"Error fetching user by id {user_id}: {e}", exc_info=True)
         return None
 
+@ttl_cached("user_id", key=lambda username: username.lower(), ttl=300)
+def get_user_id_by_username(username: str) -> Optional[str]:
+    """
+    Resolves a username (case-insensitive) to its user_id.
+    Cached for 5 minutes: usernames are immutable after registration, so entries never go stale.
+    """
+    try:
+        res = supabase.table("users").select("id").eq("username", username.lower()).single().execute()
+        return res.data["id"] if res.data else None
+    except Exception as e:
+        logger.error(f"Error resolving user_id for username {username}: {e}", exc_info=True)
+        return None
+
 def update_user_plan_and_subdomain(user_id: str, plan: str, subdomain: str):
     """
     Updates a user's plan and subdomain.
@@ -61,6 +82,7 @@ def update_user_plan_and_subdomain(user_id: str, plan: str, subdomain: str):
             "plan": plan,
             "subdomain": subdomain
         }).eq("id", user_id).execute()
+        invalidate(f"user:{user_id}")
         logger.info(f"Updated plan and subdomain for user_id {user_id}: {plan}, {subdomain}")
     except Exception as e:
         logger.error(f"Error updating plan/subdomain for user_id {user_id}: {e}", exc_info=True)
@@ -74,20 +96,23 @@ def soft_delete_active_profile(user_id: str) -> int:
     Soft deletes the active profile in Supabase for the given user_id.
     Returns number of rows updated.
     """
-    from app.services.supabase import supabase
-    response = supabase.table("profiles").update({"is_active": False}).eq("user_id", user_id).eq("is_active", True).execute()
+    # count="exact" makes PostgREST return the affected-row count (otherwise response.count is None)
+    response = supabase.table("profiles").update({"is_active": False}, count="exact").eq("user_id", user_id).eq("is_active", True).execute()
     return response.count or 0
 
-def deactivate_user_profiles(user_id: str):
+def deactivate_user_profiles(user_id: str) -> int:
     """
     Sets all previous profiles for this user as inactive (is_active=False).
     Used before inserting a new active profile (soft delete).
+    Returns number of rows updated (0 on error).
     """
     try:
-        supabase.table("profiles").update({"is_active": False}).eq("user_id", user_id).eq("is_active", True).execute()
-        logger.info(f"Deactivated all active profiles for user_id {user_id}")
+        response = supabase.table("profiles").update({"is_active": False}, count="exact").eq("user_id", user_id).eq("is_active", True).execute()
+        logger.info(f"Deactivated {response.count or 0} active profiles for user_id {user_id}")
+        return response.count or 0
     except Exception as e:
         logger.error(f"Error deactivating profiles for user_id {user_id}: {e}", exc_info=True)
+        return 0
 
 def insert_user_profile_metadata(
     user_id: str,
@@ -129,20 +154,34 @@ def get_user_profile_history(user_id: str) -> List[Dict[str, Any]]:
         logger.error(f"Error fetching profile history for user_id {user_id}: {e}", exc_info=True)
         return []
 
+@ttl_cached("settings", key=lambda user_id: user_id)
+def get_profile_settings_bundle(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetches user row, upload history and OpenAI key/model in one RPC (get_profile_settings).
+    Returns: {"user": {...}, "uploads": [...], "openai": {...} | None}, or None if user not found.
+    """
+    try:
+        res = supabase.rpc("get_profile_settings", {"p_user_id": user_id}).execute()
+        return res.data if res.data else None
+    except Exception as e:
+        logger.error(f"Error fetching profile settings bundle for user_id {user_id}: {e}", exc_info=True)
+        return None
+
+@ttl_cached("profile", key=lambda username: username.lower(), ttl=300)
 def get_user_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
     """
     Given a username, returns the active profile metadata for that user.
     Used for public subdomain (username.agereone.com) and AI chat.
+    Cached for 5 minutes under the lowercased username (usernames are case-insensitive);
+    upload/delete call invalidate_profile_by_username().
     Returns: profile dict or None.
     """
     try:
-        # 1. Get user_id by username
-        user_res = supabase.table("users").select("id").eq("username", username).single().execute()
-        user = user_res.data
-        if not user:
+        # 1. Get user_id by username (cached resolver, usually no round-trip)
+        user_id = get_user_id_by_username(username)
+        if not user_id:
             logger.warning(f"No user found with username {username}")
             return None
-        user_id = user["id"]
         # 2. Get active (and published) profile for that user
         profile_res = supabase.table("profiles").select("*").eq("user_id", user_id).eq("is_active", True).eq("is_published", True).single().execute()
         if profile_res.data:
@@ -153,10 +192,18 @@ def get_user_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching profile by username {username}: {e}", exc_info=True)
         return None
 
+def invalidate_profile_by_username(username: Optional[str]):
+    """Drops the cached active profile for `username` (the whole namespace if the username is unknown)."""
+    if username:
+        invalidate(f"profile:{username.lower()}")  # Same key as get_user_profile_by_username
+    else:
+        clear("profile")
+
 # -------------------------------------------------
 # OPENAI KEY/MODEL HELPERS
 # -------------------------------------------------
 
+@ttl_cached("openai", key=lambda user_id: user_id, cache_if=lambda result: result[0] is not None)
 def get_openai_key_and_model_for_user(user_id: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Fetches the OpenAI API key and model for a given user_id from openai_keys table.
@@ -165,20 +212,58 @@ def get_openai_key_and_model_for_user(user_id: str) -> Tuple[Optional[str], Opti
     try:
         res = supabase.table("openai_keys").select("api_key, model").eq("user_id", user_id).single().execute()
         if res.data:
-            return res.data["api_key"], res.data.get("model")
+            _reencrypt_legacy_key(user_id, res.data["api_key"])
+            return decrypt_secret(res.data["api_key"], user_id), res.data.get("model")
         return None, None
     except Exception as e:
         logger.error(f"Error fetching OpenAI key/model for user_id {user_id}: {e}", exc_info=True)
         return None, None
 
+def _reencrypt_legacy_key(user_id: str, stored: str):
+    """
+    Rows written before encryption at rest hold the key in plaintext: encrypt them on first read.
+    The update only matches the plaintext value just read, so a concurrent key change is never overwritten.
+    Best effort: a failure is logged and the row is retried on the next read.
+    """
+    if not stored or is_encrypted(stored):
+        return
+    try:
+        supabase.table("openai_keys").update({
+            "api_key": encrypt_secret(stored, user_id),
+        }).eq("user_id", user_id).eq("api_key", stored).execute()
+        logger.info(f"Re-encrypted legacy plaintext OpenAI key for user_id {user_id}")
+    except Exception as e:
+        logger.error(f"Failed to re-encrypt legacy OpenAI key for user_id {user_id}: {e}", exc_info=True)
+
+def deactivate_profiles_and_get_openai_key(user_id: str) -> Tuple[Optional[str], Optional[str], int]:
+    """
+    One RPC (deactivate_and_get_key): fetches the OpenAI key/model and, if a key exists,
+    marks all active profiles inactive in the same transaction.
+    Returns (api_key, model, deactivated_count), or (None, None, 0) if no key is configured (nothing is deactivated).
+    deactivated_count is informational (logs): it says nothing about which vectors are left in Qdrant.
+    """
+    try:
+        res = supabase.rpc("deactivate_and_get_key", {"p_user_id": user_id}).execute()
+        if res.data:
+            row = res.data[0]
+            deactivated = row.get("deactivated") or 0
+            logger.info(f"Deactivated {deactivated} active profiles for user_id {user_id}")
+            _reencrypt_legacy_key(user_id, row["api_key"])
+            return decrypt_secret(row["api_key"], user_id), row.get("model"), deactivated
+        return None, None, 0
+    except Exception as e:
+        logger.error(f"Error deactivating profiles / fetching OpenAI key for user_id {user_id}: {e}", exc_info=True)
+        return None, None, 0
+
 def upsert_openai_key_and_model(user_id: str, api_key: str, model: str):
     """
-    Saves or updates OpenAI API key/model for the user.
+    Saves or updates OpenAI API key/model for the user (plus the masked key shown in settings).
     """
     try:
         supabase.table("openai_keys").upsert({
             "user_id": user_id,
-            "api_key": api_key,
+            "api_key": encrypt_secret(api_key, user_id),  # AES-GCM, bound to this user_id
+            "api_key_masked": f"{api_key[:6]}...{api_key[-4:]}",  # Display form for /profile-settings
             "model": model
         }, on_conflict="user_id").execute()
         logger.info(f"Upserted OpenAI key/model for user_id {user_id}")
@@ -201,7 +286,8 @@ What It Does:
     - Fetches and manages user and profile rows in Supabase.
     - Handles soft deletion (deactivation) of profiles.
     - Inserts new profile metadata on upload.
-    - Gets/sets OpenAI API keys and models per user.
+    - Gets/sets OpenAI API keys and models per user (keys AES-GCM encrypted at rest, see app/utils/crypto.py;
+      legacy plaintext rows are re-encrypted the first time they are read).
     - Looks up active published profiles by username for public AI pages.
     - Updates user plan/subdomain on upgrade/downgrade.
     - Returns history/metadata for dashboard and analytics.
@@ -212,7 +298,11 @@ Used By:
 
 Good Practice:
     - All DB logic lives in one service file (DRY, maintainable).
+    - User lookups select only USER_COLS (smaller PostgREST payloads).
+    - One shared service-role client with a tuned keep-alive pool (no per-module create_client).
     - Errors are always caught and logged for observability.
+    - Hot per-user reads (user row, username -> user_id, OpenAI key/model, active profile by username)
+      are TTL-cached (app/services/cache.py).
     - No secrets/API keys are ever logged.
     - Designed for extension (Stripe, analytics, quotas, etc).
 
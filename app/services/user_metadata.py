@@ -2,14 +2,13 @@
 
 import logging
 from fastapi import APIRouter, HTTPException, Depends, Query
-from supabase import create_client, Client
-from app.core.config import settings
-from app.deps.supabase_auth import get_current_user
+from typing import Optional
+from app.deps.supabase_auth import get_current_user, get_current_username
+from app.services.supabase import supabase  # Shared service-role client (one connection pool)
 from pydantic import BaseModel
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
 
 class UserMetadataResponse(BaseModel):
     user: dict
@@ -18,27 +17,31 @@ class UserMetadataResponse(BaseModel):
 @router.get("/user-metadata", response_model=UserMetadataResponse)
 def get_user_metadata(
     username: str = Query(..., min_length=8),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    own_username: Optional[str] = Depends(get_current_username),
 ):
-    logger.info(f"User {user.get('username')} requests metadata for username={username}")
+    logger.info(f"User {own_username} requests metadata for username={username}")
 
     # Enforce user is only accessing their own metadata
-    if user.get("username", "").lower() != username.lower():
-        logger.warning(f"Unauthorized metadata access attempt by user={user.get('username')} for username={username}")
+    if (own_username or "").lower() != username.lower():  # None-safe: no users row -> 403
+        logger.warning(f"Unauthorized metadata access attempt by user={own_username} for username={username}")
         raise HTTPException(status_code=403, detail="Unauthorized.")
 
-    user_res = supabase.table("users").select("*").eq("username", username.lower()).single().execute()
-    if not user_res or not user_res.data:
+    # Ownership is checked above, so the token's user_id is the requested user's id (no username lookup)
+    user_id = user["user_id"]
+    # Full row (select "*"): the response contract returns every users column, not just USER_COLS
+    user_res = supabase.table("users").select("*").eq("id", user_id).single().execute()
+    user_row = user_res.data if user_res else None
+    if not user_row:
         logger.warning(f"User {username} not found in Supabase lookup")
         raise HTTPException(status_code=404, detail="User not found.")
-    user_id = user_res.data["id"]
 
     key_res = supabase.table("openai_keys").select("model").eq("user_id", user_id).single().execute()
     openai_info = key_res.data if key_res and key_res.data else None
 
     logger.info(f"Successfully returned metadata for user={username} (user_id={user_id})")
     return {
-        "user": user_res.data,
+        "user": user_row,
         "openai": openai_info
     }
 
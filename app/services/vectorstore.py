@@ -1,25 +1,62 @@
 # app/services/vectorstore.py ** NEW
 
+import asyncio
 import logging
+import threading
 import uuid
-from typing import List, Dict
-from qdrant_client import QdrantClient
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http.models import (
     PointStruct,
     Filter,
     FieldCondition,
     MatchValue,
+    Range,
     SearchParams,
+    QuantizationSearchParams,
     VectorParams,
-    Distance
+    VectorParamsDiff,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
 )
-from langchain_openai import OpenAIEmbeddings
+from redis.exceptions import RedisError
 from app.core.config import settings
-from app.utils.embeddings import get_text_embedding
+from app.core.redis_client import get_async_redis
+from app.services.cache import SemanticCache
+from app.utils.embeddings import EMBED_BATCH_SIZE, aget_text_embedding, aget_text_embeddings
+from app.utils.text_splitter import split_text
 
 logger = logging.getLogger(__name__)
 
 COLLECTION_NAME = "career_profiles"
+# Embedding models whose vectors fit the collection (size=1536); anything else falls back to the default
+VALID_EMBEDDING_MODELS = frozenset(("text-embedding-3-small", "text-embedding-ada-002"))
+DEFAULT_EMBEDDING_MODEL = (
+    settings.EMBEDDING_MODEL if settings.EMBEDDING_MODEL in VALID_EMBEDDING_MODELS else "text-embedding-3-small"
+)
+if DEFAULT_EMBEDDING_MODEL != settings.EMBEDDING_MODEL:
+    logger.warning(f"Invalid EMBEDDING_MODEL '{settings.EMBEDDING_MODEL}', using {DEFAULT_EMBEDDING_MODEL}.")
+
+# Namespace for deterministic point ids: uuid5(CHUNK_NAMESPACE, "<user_id>:<chunk_idx>")
+CHUNK_NAMESPACE = uuid.UUID("5d0c7a8e-3f4b-4e59-9a1c-2b6f0e8d4c71")
+UPSERT_BATCH_SIZE = 32  # Points per Qdrant upsert request
+UPSERT_CONCURRENCY = 4  # Max upsert requests in flight per profile upload
+EMBED_CONCURRENCY = 4  # Max OpenAI embedding requests in flight per profile upload (pipeline)
+PIPELINE_QUEUE_SIZE = 4  # Batches buffered between pipeline stages (bounds memory and back-pressures)
+BULK_UPLOAD_MIN_POINTS = 500  # Uploads above this size pause HNSW indexing while writing
+DEFAULT_INDEXING_THRESHOLD = 20000  # Qdrant's default, restored when the pre-upload value is unknown
+# Bulk uploads are tracked in Redis, so all workers share one pause of the collection-wide indexing_threshold
+BULK_REDIS_PREFIX = f"qdrant:bulk:{COLLECTION_NAME}"
+BULK_STATE_TTL = 3600  # Seconds; a worker that dies mid-upload cannot leave the counter stuck for longer
+BULK_LOCK_TIMEOUT = 10  # Seconds the pause/restore transition may hold the lock
+
+# Search results of recent questions, reused for paraphrases (scoped per user, profile version, model and top_k)
+semantic_results = SemanticCache(threshold=settings.SEMANTIC_CACHE_THRESHOLD, ttl=600)
 
 # Initialize Qdrant client (singleton pattern)
 client = QdrantClient(
@@ -27,74 +64,113 @@ client = QdrantClient(
     api_key=settings.QDRANT_API_KEY
 )
 
-def ensure_collection_exists():
-    logger.info("Ensuring Qdrant collection and payload index exist...")
-    collections = [col.name for col in client.get_collections().collections]
-    if COLLECTION_NAME not in collections:
-        logger.info(f"Creating new collection: {COLLECTION_NAME}")
-        client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=1536, distance=Distance.COSINE),
-        )
-        client.create_payload_index(
-            collection_name=COLLECTION_NAME,
-            field_name="user_id",
-            field_schema="keyword"
-        )
+# Async client for searches and bulk writes from async routes (no threadpool hop, concurrent batches)
+async_client = AsyncQdrantClient(
+    url=settings.QDRANT_URL,
+    api_key=settings.QDRANT_API_KEY
+)
 
-def get_valid_embedding_model(model: str = None):
-    model_candidate = model or settings.EMBEDDING_MODEL
-    if not model_candidate or not model_candidate.startswith("text-embedding"):
-        logger.warning(f"Invalid or missing embedding model '{model_candidate}', using default.")
-        return "text-embedding-3-small"
-    return model_candidate
-
-def qdrant_upsert(docs: List[Dict]):
-    logger.info(f"Upserting {len(docs)} vectors into Qdrant collection {COLLECTION_NAME}")
-    ensure_collection_exists()
-    points = [
-        PointStruct(
-            id=doc["id"],
-            vector=doc["vector"],
-            payload=doc["payload"]
-        )
-        for doc in docs
-    ]
-    client.upsert(collection_name=COLLECTION_NAME, points=points)
-    logger.info("Qdrant upsert completed.")
+# Storage layout: binary quantized vectors (1 bit/dim, 192 bytes per 1536-dim vector) stay in RAM for search,
+# FP32 originals and the HNSW graph live on disk. Binary quantization suits the collection's cosine distance.
+QUANTIZATION_CONFIG = BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+HNSW_CONFIG = HnswConfigDiff(on_disk=True)
+# Search the binary vectors first (3x oversampled to make up for the coarser codes),
+# then rescore those candidates with the FP32 originals
+SEARCH_PARAMS = SearchParams(
+    hnsw_ef=128,
+    quantization=QuantizationSearchParams(rescore=True, oversampling=3.0),
+)
 
-def qdrant_query(user_id: str, query: str, openai_key: str, model: str = None) -> List[Dict]:
-    logger.info(f"Running Qdrant vector search for user_id={user_id}, query={query[:40]}...")
-    ensure_collection_exists()
-    model = get_valid_embedding_model(model)
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_key, model=model)
-    query_vector = embeddings.embed_query(query)
-    search_filter = Filter(
-        must=[
-            FieldCondition(
-                key="user_id",
-                match=MatchValue(value=user_id)
+# Set once the collection is known to exist, so vector ops skip the get_collections round-trip
+_collection_ready = False
+_collection_lock = threading.Lock()
+
+def ensure_collection_exists():
+    global _collection_ready
+    if _collection_ready:
+        return
+    with _collection_lock:
+        if _collection_ready:  # Another thread finished the check while we waited
+            return
+        logger.info("Ensuring Qdrant collection and payload index exist...")
+        collections = [col.name for col in client.get_collections().collections]
+        if COLLECTION_NAME not in collections:
+            logger.info(f"Creating new collection: {COLLECTION_NAME}")
+            client.create_collection(
+                collection_name=COLLECTION_NAME,
+                vectors_config=VectorParams(size=1536, distance=Distance.COSINE, on_disk=True),
+                hnsw_config=HNSW_CONFIG,
+                quantization_config=QUANTIZATION_CONFIG,
             )
-        ]
-    )
-    results = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
-        limit=15,
-        search_params=SearchParams(hnsw_ef=128),
-        query_filter=search_filter
-    )
-    logger.info(f"Qdrant search returned {len(results)} hits for user_id {user_id}")
-    return [{"text": hit.payload.get("text", ""), "score": hit.score} for hit in results]
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name="user_id",
+                field_schema="keyword"
+            )
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name="chunk_idx",
+                field_schema="integer"
+            )
+        else:
+            info = client.get_collection(COLLECTION_NAME)
+            if not isinstance(info.config.quantization_config, BinaryQuantization):
+                # Collection created without (or with int8) quantization: migrate it in place
+                # (Qdrant rebuilds segments in the background)
+                logger.info(f"Enabling binary quantization and on-disk storage for collection: {COLLECTION_NAME}")
+                client.update_collection(
+                    collection_name=COLLECTION_NAME,
+                    vectors_config={"": VectorParamsDiff(on_disk=True)},
+                    hnsw_config=HNSW_CONFIG,
+                    quantization_config=QUANTIZATION_CONFIG,
+                )
+            if "chunk_idx" not in (info.payload_schema or {}):
+                logger.info(f"Creating chunk_idx payload index on collection: {COLLECTION_NAME}")
+                client.create_payload_index(
+                    collection_name=COLLECTION_NAME,
+                    field_name="chunk_idx",
+                    field_schema="integer"
+                )
+        _collection_ready = True
+
+async def _ensure_collection():
+    """Async callers: only hop to the threadpool for the (one-time) collection check."""
+    if not _collection_ready:
+        await run_in_threadpool(ensure_collection_exists)
 
-def query_profile_vectors(user_id: str, query_text: str, openai_key: str, model: str = None, top_k: int = 6) -> List[Dict]:
+def get_valid_embedding_model(model: str = None):
+    """Returns `model` if it fits the collection (1536-dim embedding model), else the configured default."""
+    return model if model in VALID_EMBEDDING_MODELS else DEFAULT_EMBEDDING_MODEL
+
+async def query_profile_vectors(
+    user_id: str,
+    query_text: str,
+    openai_key: str,
+    model: str = None,
+    top_k: int = 6,
+    cache_scope=None,
+) -> List[Dict]:
+    """
+    Top-k chunks of the user's profile for a question.
+    With a `cache_scope` (e.g. the active profile id, which changes on re-upload), results are also
+    cached by embedding: a question whose vector is within SEMANTIC_CACHE_THRESHOLD (cosine) of a
+    recent one reuses its hits and skips Qdrant.
+    """
     logger.info(f"Semantic search: user_id={user_id}, top_k={top_k}, query='{query_text[:40]}...'")
-    ensure_collection_exists()
-    query_vector = get_text_embedding(query_text, openai_key=openai_key, model=model)
+    await _ensure_collection()
+    model = get_valid_embedding_model(model)  # Same fallback as the upload, so query and chunks share a model
+    query_vector = await aget_text_embedding(query_text, openai_key=openai_key, model=model)  # Cached per model/key/query
     if not query_vector:
         logger.warning(f"Failed to generate query embedding for user_id {user_id}")
         return []
 
+    scope = (user_id, cache_scope, model, top_k) if cache_scope is not None else None
+    if scope is not None:
+        hits = semantic_results.get(scope, query_vector)
+        if hits is not None:
+            logger.info(f"Semantic cache hit for user_id {user_id}, skipping Qdrant search")
+            return hits
+
     search_filter = Filter(
         must=[
             FieldCondition(
@@ -103,32 +179,22 @@ def query_profile_vectors(user_id: str, query_text: str, openai_key: str, model:
             )
         ]
     )
-    results = client.search(
+    results = (await async_client.query_points(
         collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
+        query=query_vector,
+        query_filter=search_filter,
         limit=top_k,
-        search_params=SearchParams(hnsw_ef=128),
-        query_filter=search_filter
-    )
+        search_params=SEARCH_PARAMS,
+        with_payload=["text"],  # Only the field we return
+    )).points
     logger.info(f"Qdrant search returned {len(results)} hits for user_id {user_id}")
-    return [{"text": hit.payload.get("text", ""), "score": hit.score} for hit in results]
-
-def store_profile_vectors(
-    user_id: str,
-    text: str,
-    openai_key: str,
-    model: str = None,
-    chunk_size: int = None,
-    chunk_overlap: int = None,
-    user_plan: str = "free"
-) -> int:
-    """
-    Splits and stores a user's uploaded profile in Qdrant.
-    Supports plan-based chunking customization.
-    Returns number of chunks embedded.
-    """
-    logger.info(f"Storing profile vectors for user_id={user_id} with model={model}, plan={user_plan}")
+    hits = [{"text": hit.payload.get("text", ""), "score": hit.score} for hit in results]
+    if scope is not None and hits:
+        semantic_results.put(scope, query_vector, hits)
+    return hits
 
+def _chunk_settings(chunk_size: int, chunk_overlap: int, user_plan: str) -> Tuple[int, int]:
+    """Resolves (chunk_size, chunk_overlap): paid plans may customize, everyone else gets the configured defaults."""
     use_custom_chunks = user_plan in ("paid", "premium", "pro")
     config_chunk_size = getattr(settings, "DEFAULT_CHUNK_SIZE", 400)
     config_chunk_overlap = getattr(settings, "DEFAULT_CHUNK_OVERLAP", 20)
@@ -141,37 +207,205 @@ def store_profile_vectors(
         _chunk_overlap = config_chunk_overlap
 
     logger.info(f"Chunking settings: size={_chunk_size}, overlap={_chunk_overlap}")
+    return _chunk_size, _chunk_overlap
 
-    model = get_valid_embedding_model(model)
-    ensure_collection_exists()
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
+def _chunk_point(user_id: str, chunk_idx: int, chunk: str, vector: List[float]) -> PointStruct:
+    # Deterministic ids: a re-upload overwrites chunk i in place instead of needing a delete first.
+    # Per-upload settings (model, chunking, plan) live once on the Supabase profile row, not on every point.
+    return PointStruct(
+        id=str(uuid.uuid5(CHUNK_NAMESPACE, f"{user_id}:{chunk_idx}")),
+        vector=vector,
+        payload={
+            "user_id": user_id,
+            "chunk_idx": chunk_idx,
+            "text": chunk,
+        }
+    )
+
+async def _get_indexing_threshold() -> Optional[int]:
+    info = await async_client.get_collection(collection_name=COLLECTION_NAME)
+    return info.config.optimizer_config.indexing_threshold
+
+async def _set_indexing_threshold(threshold: int):
+    await async_client.update_collection(
+        collection_name=COLLECTION_NAME,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold),
+    )
+
+async def _pause_indexing(point_count: int) -> bool:
+    """
+    Registers a bulk upload across all workers; the first one saves the current indexing_threshold
+    and sets it to 0. Returns False (write into the live index) if Redis is unavailable.
+    """
+    redis = get_async_redis()
+    try:
+        async with redis.lock(f"{BULK_REDIS_PREFIX}:lock", timeout=BULK_LOCK_TIMEOUT, blocking_timeout=BULK_LOCK_TIMEOUT):
+            active = await redis.incr(f"{BULK_REDIS_PREFIX}:count")
+            await redis.expire(f"{BULK_REDIS_PREFIX}:count", BULK_STATE_TTL)
+            if active == 1:
+                current = await _get_indexing_threshold()
+                if current:  # 0 means a crashed upload left it paused: keep the value it saved
+                    await redis.set(f"{BULK_REDIS_PREFIX}:threshold", current, ex=BULK_STATE_TTL)
+                logger.info(f"Bulk upload of {point_count} vectors: pausing HNSW indexing (was {current})")
+                await _set_indexing_threshold(0)
+        return True
+    except RedisError as e:
+        logger.warning(f"Bulk upload coordination unavailable, keeping HNSW indexing on: {e}")
+        return False
 
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=_chunk_size, chunk_overlap=_chunk_overlap)
-    chunks = text_splitter.split_text(text)
+async def _resume_indexing():
+    """The last bulk upload across all workers restores the saved indexing_threshold."""
+    redis = get_async_redis()
+    try:
+        async with redis.lock(f"{BULK_REDIS_PREFIX}:lock", timeout=BULK_LOCK_TIMEOUT, blocking_timeout=BULK_LOCK_TIMEOUT):
+            if await redis.decr(f"{BULK_REDIS_PREFIX}:count") > 0:
+                return
+            saved = await redis.get(f"{BULK_REDIS_PREFIX}:threshold")
+            threshold = int(saved) if saved else DEFAULT_INDEXING_THRESHOLD
+            await _set_indexing_threshold(threshold)
+            await redis.delete(f"{BULK_REDIS_PREFIX}:count", f"{BULK_REDIS_PREFIX}:threshold")
+            logger.info(f"HNSW indexing re-enabled after bulk upload (indexing_threshold={threshold})")
+    except RedisError as e:
+        # Without the counter, leaving indexing paused is worse than ending another worker's pause early
+        logger.warning(f"Bulk upload coordination unavailable, re-enabling HNSW indexing: {e}")
+        try:
+            await _set_indexing_threshold(DEFAULT_INDEXING_THRESHOLD)
+        except Exception as e:
+            logger.error(f"Failed to re-enable HNSW indexing on {COLLECTION_NAME}: {e}", exc_info=True)
+    except Exception as e:
+        logger.error(f"Failed to re-enable HNSW indexing on {COLLECTION_NAME}: {e}", exc_info=True)
+
+@asynccontextmanager
+async def _bulk_load(point_count: int):
+    """
+    Above BULK_UPLOAD_MIN_POINTS, pauses HNSW indexing while the block writes, so the graph is built
+    in one pass afterwards. Smaller writes go straight into the live index.
+    The threshold is collection-wide, so concurrent uploads on any worker share one pause (Redis counter,
+    transitions under a Redis lock) and the value from before the first upload is restored by the last.
+    """
+    if point_count <= BULK_UPLOAD_MIN_POINTS:
+        yield
+        return
+
+    try:
+        paused = await _pause_indexing(point_count)
+    except Exception as e:  # Qdrant read/update failed: the counter is still held, so release it below
+        logger.error(f"Failed to pause HNSW indexing on {COLLECTION_NAME}: {e}", exc_info=True)
+        paused = True
+    try:
+        yield
+    finally:
+        if paused:
+            await _resume_indexing()
+
+async def store_profile_vectors(
+    user_id: str,
+    text: str,
+    openai_key: str,
+    model: str = None,
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    user_plan: str = "free",
+) -> int:
+    """
+    Splits and stores a user's uploaded profile in Qdrant, replacing the previous one.
+    Embedding and upserts are pipelined (_ingest_chunks); chunks left over from a longer previous
+    upload are deleted concurrently (prune_profile_vectors, one filtered delete). The prune always runs:
+    vectors may exist without an active profile row (e.g. a previous upload failed midway).
+    Returns number of chunks embedded.
+    """
+    logger.info(f"Storing profile for user_id={user_id} with model={model}, plan={user_plan}")
+    _chunk_size, _chunk_overlap = _chunk_settings(chunk_size, chunk_overlap, user_plan)
+    model = get_valid_embedding_model(model)
+    chunks = await run_in_threadpool(split_text, text, _chunk_size, _chunk_overlap)  # Single regex pass
     logger.info(f"Text split into {len(chunks)} chunks.")
 
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_key, model=model)
-    embedded_docs = []
-    for chunk in chunks:
-        vector = embeddings.embed_query(chunk)
-        embedded_docs.append(
-            PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
-                payload={
-                    "user_id": user_id,
-                    "text": chunk,
-                    "model": model,
-                    "chunk_size": _chunk_size,
-                    "chunk_overlap": _chunk_overlap,
-                    "plan": user_plan
-                }
-            )
+    await _ensure_collection()
+    async with _bulk_load(len(chunks)):
+        await asyncio.gather(
+            _ingest_chunks(user_id, chunks, openai_key, model),
+            prune_profile_vectors(user_id, len(chunks)),
+        )
+    logger.info(f"Profile vectors successfully stored in Qdrant for user_id={user_id}")
+    return len(chunks)
+
+async def _ingest_chunks(user_id: str, chunks: List[str], openai_key: str, model: str):
+    """
+    Streaming embed -> upsert pipeline over bounded queues:
+    batches of EMBED_BATCH_SIZE chunks -> EMBED_CONCURRENCY embedders (aget_text_embeddings, Redis-cached)
+    -> UPSERT_BATCH_SIZE point batches -> UPSERT_CONCURRENCY upserters (wait=False).
+    Qdrant writes start as soon as the first batch is embedded. Any failure cancels every stage.
+    """
+    chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    point_queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    embedders_left = EMBED_CONCURRENCY
+
+    async def chunker():
+        for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+            await chunk_queue.put(start)
+        for _ in range(EMBED_CONCURRENCY):
+            await chunk_queue.put(None)  # One stop signal per embedder
+
+    async def embedder():
+        nonlocal embedders_left
+        while (start := await chunk_queue.get()) is not None:
+            batch = chunks[start:start + EMBED_BATCH_SIZE]
+            vectors = await aget_text_embeddings(batch, openai_key=openai_key, model=model)  # Unchanged chunks hit the cache
+            points = [
+                _chunk_point(user_id, start + i, chunk, vector)
+                for i, (chunk, vector) in enumerate(zip(batch, vectors))
+            ]
+            for i in range(0, len(points), UPSERT_BATCH_SIZE):
+                await point_queue.put(points[i:i + UPSERT_BATCH_SIZE])
+        embedders_left -= 1
+        if embedders_left == 0:  # Last embedder done: stop the upserters
+            for _ in range(UPSERT_CONCURRENCY):
+                await point_queue.put(None)
+
+    async def upserter():
+        while (batch := await point_queue.get()) is not None:
+            await async_client.upsert(collection_name=COLLECTION_NAME, points=batch, wait=False)
+
+    tasks = [
+        asyncio.ensure_future(stage)
+        for stage in (
+            chunker(),
+            *(embedder() for _ in range(EMBED_CONCURRENCY)),
+            *(upserter() for _ in range(UPSERT_CONCURRENCY)),
+        )
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()  # Don't leave stages blocked on a queue forever
+        raise
+
+async def prune_profile_vectors(user_id: str, keep: int):
+    """
+    Deletes the user's points left over from a longer previous upload (chunk_idx >= keep),
+    plus legacy points without chunk_idx. Never touches chunks 0..keep-1, so it is safe
+    to run concurrently with the upsert of the new profile.
+    """
+    await _ensure_collection()
+    logger.info(f"Pruning stale Qdrant vectors for user_id={user_id} (keeping chunk_idx < {keep})")
+    await async_client.delete(
+        collection_name=COLLECTION_NAME,
+        points_selector=Filter(
+            must=[
+                FieldCondition(
+                    key="user_id",
+                    match=MatchValue(value=user_id)
+                )
+            ],
+            must_not=[
+                FieldCondition(
+                    key="chunk_idx",
+                    range=Range(lt=keep)
+                )
+            ]
         )
-    logger.info(f"Upserting {len(embedded_docs)} vectors into Qdrant...")
-    client.upsert(collection_name=COLLECTION_NAME, points=embedded_docs)
-    logger.info("Profile vectors successfully upserted in Qdrant.")
-    return len(embedded_docs)
+    )
 
 def delete_user_vectors(user_id: str):
     logger.info(f"Deleting all Qdrant vectors for user_id={user_id}")
@@ -196,8 +430,22 @@ Purpose:
     and chunk storage for user career profiles.
 
 What It Does:
-    - Upserts embedded profile chunks per user
-    - Semantic search (query_profile_vectors) for chat context
+    - Upserts embedded profile chunks per user (chunks embedded in batches of EMBED_BATCH_SIZE per request)
+    - Point payloads are minimal ({user_id, chunk_idx, text}); searches fetch only "text"
+    - Point ids are uuid5("<user_id>:<chunk_idx>"): re-uploads overwrite in place, and
+      prune_profile_vectors drops only the leftover tail (chunk_idx >= new count)
+    - store_profile_vectors pipelines the upload: chunk batches -> async embedding workers -> async upsert
+      workers over bounded queues, so OpenAI and Qdrant requests overlap; the leftover-tail prune runs
+      alongside it
+    - Upserts go through AsyncQdrantClient in batches of UPSERT_BATCH_SIZE (bounded concurrency, wait=False)
+    - Large uploads (> BULK_UPLOAD_MIN_POINTS) pause HNSW indexing (indexing_threshold=0) and restore
+      the previous threshold afterwards; the pause is shared by all workers through a Redis counter
+      and lock, so one worker finishing cannot re-enable indexing under another's upload;
+      small profiles write straight into the live index
+    - Async semantic search (query_profile_vectors) for chat context via query_points: candidates come from the
+      binary vectors (3x oversampled) and are rescored with FP32; query embeddings are cached
+      (app/utils/embeddings.py), so repeated questions skip the OpenAI round-trip; with a cache_scope,
+      paraphrased questions (cosine >= SEMANTIC_CACHE_THRESHOLD) reuse recent hits (SemanticCache)
     - Deletes all vectors for user on profile delete/account delete
 
 Used By:
@@ -206,7 +454,10 @@ Used By:
     - dashboard analytics
 
 Good Practice:
-    - Always ensure collection exists (idempotent)
+    - Collection uses binary quantization (always_ram) with on-disk FP32 vectors and HNSW;
+      pre-existing collections are migrated by ensure_collection_exists
+    - Always ensure collection exists (idempotent; checked once per process, then a flag short-circuits it,
+      and main.py runs the check at startup so no request pays for it)
     - Always uses user's OpenAI key for multi-tenancy/security
     - All errors and actions logged
 
@@ -1,16 +1,65 @@
 # app/utils/agent.py ** NEW
 
-import openai
 import logging
+import threading
+import time
+from hashlib import sha256
+import httpx
+import openai
+from cachetools import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# -------------------------------------------------
+# OpenAI clients, reused per API key
+# -------------------------------------------------
+# Each client owns a keep-alive httpx pool, so repeat chats skip the TCP + TLS handshake.
+OPENAI_HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0,
+)
+_clients: LRUCache = LRUCache(maxsize=256)  # Bounded: a burst of unique keys cannot leak clients
+_async_clients: LRUCache = LRUCache(maxsize=256)
+_clients_lock = threading.Lock()
+
+# Errors caused by the user's own key/quota: expected, logged as warnings without a traceback
+OPENAI_USER_ERRORS = (
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.RateLimitError,
+)
+
+# Streamed tokens are coalesced: one SSE event per ~32 chars or 50 ms instead of one per token
+STREAM_FLUSH_CHARS = 32
+STREAM_FLUSH_SECONDS = 0.05
+
+def _get_client(api_key: str) -> openai.OpenAI:
+    """Returns the shared OpenAI client for this key (LRU, 256 entries), creating it on first use."""
+    cache_key = sha256(api_key.encode()).hexdigest()
+    with _clients_lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            client = openai.OpenAI(api_key=api_key, http_client=httpx.Client(limits=OPENAI_HTTP_LIMITS))
+            _clients[cache_key] = client
+    return client
+
+def _get_async_client(api_key: str) -> openai.AsyncOpenAI:
+    """Async counterpart of _get_client (httpx.AsyncClient pool with the same limits), for streaming."""
+    cache_key = sha256(api_key.encode()).hexdigest()
+    with _clients_lock:
+        client = _async_clients.get(cache_key)
+        if client is None:
+            client = openai.AsyncOpenAI(api_key=api_key, http_client=httpx.AsyncClient(limits=OPENAI_HTTP_LIMITS))
+            _async_clients[cache_key] = client
+    return client
+
 def ask_openai_agent(api_key, model, system_prompt, context, messages):
     """
     Calls the OpenAI chat API with full context and returns the full reply (not streaming).
     """
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = _get_client(api_key)
         chat_messages = [
             {"role": "system", "content": f"{system_prompt}\n{context}"}
         ] + messages
@@ -26,34 +75,53 @@ def ask_openai_agent(api_key, model, system_prompt, context, messages):
             return response.choices[0].message.content
         logger.warning("No choices in OpenAI response")
         return "No answer returned."
+    except OPENAI_USER_ERRORS as e:
+        logger.warning(f"OpenAI chat API call rejected ({type(e).__name__}): {e}")
+        return "AI service unavailable. Please try again later."
     except Exception as e:
         logger.error(f"OpenAI chat API call failed: {e}", exc_info=True)
         return "AI service unavailable. Please try again later."
 
-def ask_openai_agent_stream(api_key, model, system_prompt, context, messages):
+async def ask_openai_agent_stream(api_key, model, system_prompt, context, messages):
     """
     Streams tokens/chunks from OpenAI chat API (for /chat/stream endpoint).
-    Yields text chunks.
+    Async generator over AsyncOpenAI (no thread held per open stream). Yields text chunks, each
+    batching the tokens received until STREAM_FLUSH_CHARS characters or STREAM_FLUSH_SECONDS elapsed.
     """
+    buf, buffered = [], 0
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = _get_async_client(api_key)
         chat_messages = [
             {"role": "system", "content": f"{system_prompt}\n{context}"}
         ] + messages
 
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=chat_messages,
             temperature=0.7,
             stream=True,
         )
-        for chunk in response:
-            if hasattr(chunk, "choices"):
+        last_flush = time.monotonic()
+        async for chunk in response:
+            if getattr(chunk, "choices", None):
                 delta = chunk.choices[0].delta
                 if hasattr(delta, "content") and delta.content:
-                    yield delta.content
+                    buf.append(delta.content)
+                    buffered += len(delta.content)
+            # Checked on every chunk (also content-less ones), so a slow trickle still flushes on time
+            if buf and (buffered >= STREAM_FLUSH_CHARS or time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS):
+                yield "".join(buf)
+                buf, buffered = [], 0
+                last_flush = time.monotonic()
+        if buf:
+            yield "".join(buf)  # Final flush once the stream finishes
     except Exception as e:
-        logger.error(f"OpenAI streaming failed: {e}", exc_info=True)
+        if isinstance(e, OPENAI_USER_ERRORS):
+            logger.warning(f"OpenAI streaming rejected ({type(e).__name__}): {e}")
+        else:
+            logger.error(f"OpenAI streaming failed: {e}", exc_info=True)
+        if buf:
+            yield "".join(buf)  # Deliver what was received before the failure
         yield "AI service unavailable. Please try again later."
 
 """
@@ -64,14 +132,16 @@ Purpose:
 
 What It Does:
     - ask_openai_agent: Returns one full reply (dashboard, sync chat)
-    - ask_openai_agent_stream: Streams chunks for UI (SSE)
+    - ask_openai_agent_stream: Streams chunks for UI (SSE), async (AsyncOpenAI); tokens are
+      batched (32 chars / 50 ms) so each SSE event carries several tokens
 
 Used By:
     - app/routes/agent.py endpoints
 
 Good Practice:
-    - All errors handled/logged, no secrets ever returned
-    - API key passed per-user (multi-tenant)
+    - All errors handled/logged, no secrets ever returned; bad keys / exhausted quotas
+      (OPENAI_USER_ERRORS) are warnings without tracebacks, unexpected errors keep them
+    - API key passed per-user (multi-tenant); one pooled client per key (LRU-bounded), never per call
     - Can easily add validation, quota, or observability
 
 --------------------------------------------------------------------
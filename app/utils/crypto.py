@@ -0,0 +1,73 @@
+# app/utils/crypto.py
+
+import base64
+import logging
+import os
+from functools import lru_cache
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENC_PREFIX = "enc:v1:"  # Marks values encrypted by this module (legacy plaintext rows are re-encrypted on read)
+NONCE_SIZE = 12         # 96-bit nonce, the AES-GCM standard
+
+@lru_cache()
+def _aesgcm() -> AESGCM:
+    """Builds the AES-GCM cipher once from OPENAI_KEY_ENCRYPTION_KEY (base64, 32 bytes = AES-256)."""
+    key = base64.b64decode(settings.OPENAI_KEY_ENCRYPTION_KEY)
+    if len(key) != 32:
+        raise ValueError("OPENAI_KEY_ENCRYPTION_KEY must be 32 bytes, base64-encoded.")
+    return AESGCM(key)
+
+def encrypt_secret(plaintext: str, aad: str) -> str:
+    """
+    Encrypts a secret with AES-256-GCM.
+    `aad` (e.g. the user_id) is authenticated but not stored: the value only decrypts for that same owner.
+    Returns "enc:v1:" + base64(nonce || ciphertext).
+    """
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = _aesgcm().encrypt(nonce, plaintext.encode(), aad.encode())
+    return ENC_PREFIX + base64.b64encode(nonce + ciphertext).decode()
+
+def is_encrypted(value: str) -> bool:
+    """True if `value` was produced by encrypt_secret (False for legacy plaintext rows)."""
+    return value.startswith(ENC_PREFIX)
+
+def decrypt_secret(value: str, aad: str) -> str:
+    """
+    Decrypts a value produced by encrypt_secret.
+    Values without the "enc:v1:" prefix are legacy plaintext and returned unchanged.
+    Raises cryptography.exceptions.InvalidTag if the value was tampered with or the aad does not match.
+    """
+    if not is_encrypted(value):
+        return value
+    raw = base64.b64decode(value[len(ENC_PREFIX):])
+    return _aesgcm().decrypt(raw[:NONCE_SIZE], raw[NONCE_SIZE:], aad.encode()).decode()
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Encryption at rest for user secrets (OpenAI API keys) stored in Supabase.
+
+What It Does:
+    - encrypt_secret(): AES-256-GCM with a random 96-bit nonce, bound to the owner via AAD.
+    - decrypt_secret(): reverses it; legacy plaintext values pass through untouched.
+    - is_encrypted(): lets readers spot legacy plaintext rows and re-encrypt them in place.
+
+Used By:
+    - app/services/supabase.py (upsert_openai_key_and_model, get_openai_key_and_model_for_user,
+      deactivate_profiles_and_get_openai_key)
+
+Good Practice:
+    - Generate the key with: python -c "import os,base64;print(base64.b64encode(os.urandom(32)).decode())"
+    - Keep OPENAI_KEY_ENCRYPTION_KEY out of the database and version control.
+    - Bump ENC_PREFIX (enc:v2:) if the scheme or key ever changes, and re-encrypt on next write.
+
+Security & Scalability:
+    - A DB dump alone no longer exposes user keys.
+    - AES-GCM is authenticated (tampering is detected) and hardware-accelerated (AES-NI/CLMUL via OpenSSL).
+    - The cipher object is built once per process (lru_cache).
+
+--------------------------------------------------------------------
+"""
@@ -1,25 +1,153 @@
 # app/utils/embedding.py ** New
 
+import asyncio
 import logging
+import struct
+import threading
+from hashlib import blake2b, sha256
+from typing import List, Optional
+import numpy as np
+from cachetools import LRUCache
 from langchain_openai import OpenAIEmbeddings
+from redis.exceptions import RedisError
 from app.core.config import settings
+from app.core.redis_client import get_async_redis
+from app.services.cache import ttl_cached
+from app.utils.agent import OPENAI_USER_ERRORS
 
 logger = logging.getLogger(__name__)
 
-def get_text_embedding(text: str, openai_key: str = None, model: str = None):
+EMBED_BATCH_SIZE = 96  # Chunks per OpenAI embeddings request (well under the 2048-input / 300k-token caps)
+EMBEDDING_CACHE_TTL = 7 * 24 * 3600  # Seconds a vector stays in the shared Redis cache
+EMBED_REQUEST_CONCURRENCY = 8  # Max OpenAI embedding requests in flight per aget_text_embeddings call
+
+# -------------------------------------------------
+# Embedding clients, reused per (key, model)
+# -------------------------------------------------
+# Each OpenAIEmbeddings owns an HTTP client; reusing it keeps the TLS connection alive across calls.
+_embedder_cache: LRUCache = LRUCache(maxsize=256)
+_embedder_lock = threading.Lock()
+
+def get_embeddings_client(openai_key: str, model: str) -> OpenAIEmbeddings:
+    """Returns the shared OpenAIEmbeddings for this key + model (LRU, 256 entries), creating it on first use."""
+    cache_key = (sha256(openai_key.encode()).hexdigest(), model)
+    with _embedder_lock:
+        embedder = _embedder_cache.get(cache_key)
+        if embedder is None:
+            embedder = OpenAIEmbeddings(openai_api_key=openai_key, model=model, chunk_size=EMBED_BATCH_SIZE)
+            _embedder_cache[cache_key] = embedder
+    return embedder
+
+def _query_embedding_key(text: str, openai_key: str = None, model: str = None):
+    """(model, key fingerprint, text): tenants never share entries, and the raw key is never stored in the cache."""
+    key_fingerprint = blake2b((openai_key or "").encode(), digest_size=8).digest()
+    return (model or settings.EMBEDDING_MODEL, key_fingerprint, text)
+
+# -------------------------------------------------
+# Shared (Redis) embedding cache, second tier behind the in-process one
+# -------------------------------------------------
+def _redis_embedding_key(model: str, text: str) -> str:
+    """Partitioned by model, so changing EMBEDDING_MODEL never serves vectors from another model."""
+    digest = sha256(model.encode() + b"\0" + text.encode()).hexdigest()
+    return f"emb8:{model}:{digest}"  # "8": int8 encoding (old float32 "emb:" entries simply expire)
+
+def _encode_vector(vector: List[float]) -> bytes:
     """
-    Generates an embedding vector for the given text using OpenAI Embeddings API.
+    int8-quantized vector + little-endian float32 scale (max |v| / 127): 1540 bytes for 1536 dims
+    instead of 6144 as float32. Cosine error is far below what search or the semantic cache can notice.
+    """
+    v = np.asarray(vector, dtype=np.float32)
+    scale = float(np.abs(v).max()) / 127 or 1.0
+    return np.round(v / scale).astype(np.int8).tobytes() + struct.pack("<f", scale)
+
+def _decode_vector(raw: Optional[bytes]) -> Optional[List[float]]:
+    if not raw:
+        return None
+    (scale,) = struct.unpack_from("<f", raw, len(raw) - 4)
+    return (np.frombuffer(raw, dtype=np.int8, count=len(raw) - 4).astype(np.float32) * scale).tolist()
+
+@ttl_cached("query_embedding", key=_query_embedding_key, ttl=3600, maxsize=10_000)
+async def aget_text_embedding(text: str, openai_key: str = None, model: str = None):
+    """
+    Generates an embedding vector for the given text using OpenAI Embeddings API (aembed_query, no threadpool hop).
+    Two cache tiers skip the round-trip for repeated text: in-process per (model, key fingerprint, text)
+    for an hour, then Redis per (model, text) for EMBEDDING_CACHE_TTL (shared by all workers).
     """
     try:
         emb_model = model or settings.EMBEDDING_MODEL
+        redis_key = _redis_embedding_key(emb_model, text)
+        try:
+            cached = _decode_vector(await get_async_redis().get(redis_key))
+            if cached is not None:
+                return cached
+        except RedisError as e:
+            logger.warning(f"Embedding cache unavailable, calling OpenAI: {e}")
+
         openai_api_key = openai_key or settings.OPENAI_API_KEY  # Use user’s key if provided!
-        embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key, model=emb_model)
-        vector = embeddings.embed_query(text)
+        embeddings = get_embeddings_client(openai_api_key, emb_model)
+        vector = await embeddings.aembed_query(text)
+        try:
+            await get_async_redis().setex(redis_key, EMBEDDING_CACHE_TTL, _encode_vector(vector))
+        except RedisError as e:
+            logger.warning(f"Failed to store embedding in cache: {e}")
         return vector
+    except OPENAI_USER_ERRORS as e:
+        logger.warning(f"Embedding request rejected ({type(e).__name__}): {e}")
+        return None
     except Exception as e:
         logger.error(f"Error generating embedding for text: {e}", exc_info=True)
         return None
 
+async def aget_text_embeddings(texts: List[str], openai_key: str = None, model: str = None) -> List[List[float]]:
+    """
+    Batched embedding for indexing: one Redis MGET for the whole list, then the misses in EMBED_BATCH_SIZE
+    batches sent concurrently (at most EMBED_REQUEST_CONCURRENCY in flight) over the pooled client.
+    Returns the vectors in the order of `texts`. Unlike the single-text helpers, errors are raised
+    (after logging): a partially embedded profile must not be indexed.
+    """
+    if not texts:
+        return []
+    emb_model = model or settings.EMBEDDING_MODEL
+    redis_keys = [_redis_embedding_key(emb_model, text) for text in texts]
+    try:
+        vectors = [_decode_vector(raw) for raw in await get_async_redis().mget(redis_keys)]
+    except RedisError as e:
+        logger.warning(f"Embedding cache unavailable, embedding {len(texts)} texts: {e}")
+        vectors = [None] * len(texts)
+
+    misses = [i for i, vector in enumerate(vectors) if vector is None]
+    if misses:
+        openai_api_key = openai_key or settings.OPENAI_API_KEY  # Use user’s key if provided!
+        embeddings = get_embeddings_client(openai_api_key, emb_model)
+        sem = asyncio.Semaphore(EMBED_REQUEST_CONCURRENCY)
+
+        async def embed_batch(batch: List[int]) -> List[List[float]]:
+            async with sem:
+                return await embeddings.aembed_documents([texts[i] for i in batch])
+
+        batches = [misses[i:i + EMBED_BATCH_SIZE] for i in range(0, len(misses), EMBED_BATCH_SIZE)]
+        try:
+            results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        except OPENAI_USER_ERRORS as e:
+            logger.warning(f"Embedding request rejected ({type(e).__name__}): {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error generating embeddings for {len(misses)} texts: {e}", exc_info=True)
+            raise
+        for batch, fresh in zip(batches, results):
+            for i, vector in zip(batch, fresh):
+                vectors[i] = vector
+        try:
+            pipe = get_async_redis().pipeline(transaction=False)  # One round-trip for all SETEX
+            for i in misses:
+                pipe.setex(redis_keys[i], EMBEDDING_CACHE_TTL, _encode_vector(vectors[i]))
+            await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to store embeddings in cache: {e}")
+
+    logger.debug(f"Embedded {len(texts)} texts ({len(texts) - len(misses)} from cache)")
+    return vectors
+
 """
 --------------------------------------------------------------------
 Purpose:
@@ -27,16 +155,24 @@ Purpose:
     Used by vectorstore.py and semantic search/chat.
 
 What It Does:
-    - Calls OpenAI Embeddings API for input text
+    - Calls OpenAI Embeddings API for input text (aget_text_embedding)
+    - aget_text_embeddings() embeds a list: one Redis MGET, then the misses in EMBED_BATCH_SIZE batches,
+      up to EMBED_REQUEST_CONCURRENCY requests in flight
     - Returns the vector for Qdrant/semantic search
+    - get_embeddings_client() reuses one OpenAIEmbeddings (and its HTTP connection pool) per
+      key + model, LRU-capped at 256 entries
+    - Caches vectors in-process (TTL/LRU, 10k entries) keyed on model + blake2b fingerprint of the
+      OpenAI key + text; failures (None) are not cached
+    - Second tier in Redis: "emb8:<model>:<sha256(model\\0text)>" -> int8 bytes + float32 scale
+      (4x smaller than float32), 7-day TTL, shared by all workers; Redis errors fall through to OpenAI (logged)
 
 Used By:
-    - vectorstore.py (query_profile_vectors)
+    - vectorstore.py (query_profile_vectors via aget_text_embedding, the upload pipeline via aget_text_embeddings)
     - Any service that needs text→vector embedding
 
 Good Practice:
     - Always uses user’s OpenAI key if provided (multi-tenant)
-    - Handles exceptions/logs errors
+    - Handles exceptions/logs errors (key/quota rejections as warnings, without a traceback)
 
 --------------------------------------------------------------------
 """
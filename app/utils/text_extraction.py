@@ -1,54 +1,171 @@
 # app/utils/text_extraction.py ** NEW
 
+import asyncio
 import fitz  # PyMuPDF
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.process_pool import EXTRACTION_POOL_SIZE, get_extraction_pool, reset_extraction_pool
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_file(file_bytes: bytes, filename: str) -> str:
+ALLOWED_EXTENSIONS = (".pdf", ".txt", ".md")  # Checked case-insensitively, before any file content is read
+PARALLEL_PDF_MIN_PAGES = 32  # Smaller PDFs are extracted by a single worker process
+PAGES_PER_TASK_MIN = 16  # Each pool task gets at least this many pages (re-opening the file is not free)
+PDF_MAGIC = b"%PDF-"
+# Plain text for embeddings: keep whitespace, skip off-page text; no ligature glyphs (expanded to
+# letters instead), no placeholder chars for unmapped glyphs, no dehyphenation pass.
+# TEXT_INHIBIT_SPACES stays off: many PDFs have no space glyphs and words would run together.
+PDF_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+# Scanned PDFs: if the first pages hold (almost) no text, the rest is not parsed at all
+TEXT_LAYER_SAMPLE_PAGES = 3
+TEXT_LAYER_MIN_CHARS = 20
+
+def extract_text_from_file(file_path: str, filename: str) -> str:
     """
     Extracts text from uploaded files (.pdf, .txt, .md).
+    The type comes from the content, not the name: "%PDF-" magic bytes -> PDF, anything else
+    must decode as UTF-8 text (so a PDF renamed to .txt is still parsed as a PDF).
 
     Args:
-        file_bytes (bytes): Raw bytes from the uploaded file.
-        filename (str): Original filename (used for filetype detection).
+        file_path (str): Path of the spooled upload on disk (read directly, never copied into memory).
+        filename (str): Original filename (must have an ALLOWED_EXTENSIONS extension; the type itself
+            comes from the content).
 
     Returns:
         str: Extracted plain text content.
 
     Raises:
-        ValueError: If file extension is not supported.
+        ValueError: If the extension is not allowed, the file exceeds MAX_UPLOAD_BYTES, the content is
+            neither a PDF nor UTF-8 text, or the PDF has no text layer (scan).
         RuntimeError: If PDF parsing fails.
     """
-    # Case-insensitive extension check for safety
-    lower_name = filename.lower()
+    text, _ = extract_text_or_page_count(file_path, filename, split=False)
+    return text
+
+def extract_text_or_page_count(file_path: str, filename: str, split: bool = True) -> Tuple[Optional[str], int]:
+    """
+    extract_text_from_file for the process pool, in one round-trip for most uploads.
+    Returns (text, 0), or, with `split` and a PDF large enough to extract in parallel ranges,
+    (None, page_count) once its text layer has been checked. Raises like extract_text_from_file.
+    """
     try:
-        if lower_name.endswith(".pdf"):
+        _check_upload(file_path, filename)  # Name and size first: nothing is opened or parsed for rejects
+        with open(file_path, "rb") as f:
+            head = f.read(len(PDF_MAGIC))
+            if head != PDF_MAGIC:
+                data = head + f.read()  # Text: the file is read exactly once
+        if head == PDF_MAGIC:
             # PDF parsing using PyMuPDF (fitz)
-            logger.info(f"Extracting text from PDF file: {filename}")
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text
-        elif lower_name.endswith(".txt") or lower_name.endswith(".md"):
-            logger.info(f"Extracting text from plain text file: {filename}")
-            return file_bytes.decode("utf-8")
-        else:
-            logger.warning(f"Rejected unsupported file type: {filename}")
+            # PyMuPDF reads pages from the file on demand; the context manager frees MuPDF's native memory right away
+            with fitz.open(file_path, filetype="pdf") as doc:
+                sample = _text_layer_sample(doc)  # Scanned PDFs fail here, before the remaining pages are parsed
+                if split and _split_tasks(doc.page_count) >= 2:
+                    return None, doc.page_count
+                logger.info(f"Extracting text from PDF file: {filename}")
+                return sample + _pages_text(doc, min(TEXT_LAYER_SAMPLE_PAGES, doc.page_count), doc.page_count), 0
+
+        logger.info(f"Extracting text from plain text file: {filename}")
+        try:
+            return data.decode("utf-8"), 0
+        except UnicodeDecodeError:
             raise ValueError("Unsupported file format. Only PDF, TXT, and MD files are supported.")
+    except ValueError as e:
+        logger.warning(f"Rejected file {filename}: {e}")
+        raise  # Unusable content (client error), safe to show as-is
     except Exception as e:
         logger.error(f"Text extraction failed for file {filename}: {e}", exc_info=True)
         # Do not expose internal error details in production use!
         raise RuntimeError(f"Failed to extract text: {e}")
 
+def _check_upload(file_path: str, filename: str):
+    """Boundary checks that need no file content: allowed extension and size (one stat call)."""
+    if not (filename or "").lower().endswith(ALLOWED_EXTENSIONS):
+        raise ValueError("Unsupported file format. Only PDF, TXT, and MD files are supported.")
+    if os.path.getsize(file_path) > settings.MAX_UPLOAD_BYTES:
+        raise ValueError(f"File too large. Maximum size is {settings.MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+
+def _split_tasks(page_count: int) -> int:
+    """Number of page ranges a PDF is split into (< 2: extract it in one task)."""
+    if page_count < PARALLEL_PDF_MIN_PAGES:
+        return 1
+    return min(EXTRACTION_POOL_SIZE, page_count // PAGES_PER_TASK_MIN)
+
+def _pages_text(doc: fitz.Document, start: int, stop: int) -> str:
+    # sort=False skips the per-page reading-order sort; join is linear, unlike repeated +=
+    return "".join([doc[i].get_text("text", flags=PDF_TEXT_FLAGS, sort=False) for i in range(start, stop)])
+
+def _text_layer_sample(doc: fitz.Document) -> str:
+    """Text of the first TEXT_LAYER_SAMPLE_PAGES pages; ValueError if it is (nearly) empty, i.e. a scan."""
+    sample = _pages_text(doc, 0, min(TEXT_LAYER_SAMPLE_PAGES, doc.page_count))
+    if len(sample.strip()) < TEXT_LAYER_MIN_CHARS:
+        raise ValueError("PDF appears to be scanned images with no text layer (OCR is not supported).")
+    return sample
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> str:
+    """Extracts pages [start, stop) of a PDF; each pool worker opens its own Document."""
+    with fitz.open(file_path, filetype="pdf") as doc:
+        return _pages_text(doc, start, stop)
+
+async def extract_text_in_pool(file_path: str, filename: str) -> str:
+    """
+    Runs extraction in the shared process pool (outside the GIL, off the event loop).
+    Text files and small PDFs take one pool task; PDFs worth splitting (_split_tasks) are extracted
+    as contiguous page ranges by several workers at once, then joined back in page order.
+    If a worker died (MuPDF crash, OOM kill), the broken pool is replaced and the file retried once.
+    Raises the same exceptions as extract_text_from_file.
+    """
+    for attempt in range(2):
+        pool = get_extraction_pool()
+        try:
+            return await _extract_with_pool(pool, file_path, filename)
+        except BrokenProcessPool as e:
+            reset_extraction_pool(pool)
+            if attempt:
+                logger.error(f"Text extraction failed for file {filename}: worker died twice ({e})")
+                raise RuntimeError(f"Failed to extract text: {e}")
+            logger.warning(f"Extraction worker died while processing {filename}, restarting the pool and retrying")
+
+async def _extract_with_pool(pool: ProcessPoolExecutor, file_path: str, filename: str) -> str:
+    loop = asyncio.get_running_loop()
+    # Checks, text layer and (unless it gets split) the whole extraction in a single task
+    text, page_count = await loop.run_in_executor(pool, extract_text_or_page_count, file_path, filename)
+    if text is not None:
+        return text
+
+    tasks = _split_tasks(page_count)
+    logger.info(f"Extracting text from PDF file: {filename} ({page_count} pages, {tasks} workers)")
+    step = -(-page_count // tasks)  # Ceil division: the last range may be shorter
+    try:
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, extract_pdf_pages, file_path, start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ))
+    except BrokenProcessPool:
+        raise
+    except Exception as e:
+        logger.error(f"Text extraction failed for file {filename}: {e}", exc_info=True)
+        raise RuntimeError(f"Failed to extract text: {e}")
+    return "".join(parts)
+
 """
 ---------------------------------------------------------------
 Purpose:
     Safely extracts text content from user-uploaded files for profile processing.
 
 What It Does:
-    - Handles `.pdf` (via PyMuPDF/fitz) and `.txt`/`.md` (UTF-8 decode).
+    - Handles `.pdf` (via PyMuPDF/fitz) and `.txt`/`.md` (UTF-8 decode), reading from a file path.
+    - Detects PDFs by their "%PDF-" magic bytes; everything else must be valid UTF-8 text.
+    - PDF pages are extracted in stream order (no geometric sort) with minimal text flags
+      (PDF_TEXT_FLAGS), and joined once.
+    - extract_text_in_pool(): runs extraction in the process pool, one task for text files and small PDFs;
+      large PDFs are split into page ranges extracted in parallel (one Document per worker, results
+      joined in page order). A pool broken by a dead worker is rebuilt and the file retried once.
+    - Rejects scanned PDFs early: if the first 3 pages hold < 20 characters, no further page is parsed.
+    - Checks the extension (ALLOWED_EXTENSIONS) and size (MAX_UPLOAD_BYTES) before reading any content.
     - Raises clear exceptions for unsupported or malformed files.
 
 Used By:
@@ -56,7 +173,7 @@ Used By:
 
 Good Practices:
     - Always wrap I/O and decoding in try/except to prevent crashes.
-    - Validate file type/extension before processing (case-insensitive).
+    - Validate the extension before processing (route), then trust the content, not the name.
     - Avoid supporting executable/script file types.
 
 Security & Scalability:
@@ -0,0 +1,66 @@
+# app/utils/text_splitter.py
+
+import re
+from bisect import bisect_right
+from typing import List
+
+# Sentence ends (whitespace after . ! ?) and paragraph breaks; found in one C-level pass per document
+_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int = 0) -> List[str]:
+    """
+    Splits text into chunks of at most `chunk_size` characters, packed greedily up to the
+    last sentence/paragraph boundary that fits (falls back to the last space, then a hard cut).
+    Each chunk after the first starts `chunk_overlap` characters before the previous end (word-aligned).
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    n = len(text)
+    boundaries = [m.end() for m in _BOUNDARY_RE.finditer(text)]
+    chunks: List[str] = []
+    start = 0
+    while start < n:
+        limit = start + chunk_size
+        if limit >= n:
+            end = n
+        else:
+            # Cut points must leave room for the overlap, otherwise the next chunk would not advance
+            i = bisect_right(boundaries, limit) - 1
+            end = boundaries[i] if i >= 0 else 0
+            if end <= start + chunk_overlap:
+                space = text.rfind(" ", start, limit)
+                end = space + 1 if space + 1 > start + chunk_overlap else limit
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= n:
+            break
+
+        start = end - chunk_overlap
+        if chunk_overlap:
+            space = text.find(" ", start, end)
+            if space != -1:
+                start = space + 1  # Don't start the overlap mid-word
+    return chunks
+
+"""
+--------------------------------------------------------------------
+Purpose:
+    Fast, dependency-free text chunking for profile embeddings.
+
+What It Does:
+    - Finds all sentence/paragraph boundaries with one precompiled regex pass.
+    - Packs chunks greedily up to chunk_size (bisect over the boundary offsets),
+      with chunk_overlap characters carried into the next chunk.
+
+Used By:
+    - app/services/vectorstore.py (store_profile_vectors)
+
+Good Practice:
+    - O(n) over the text: no per-separator re-scans like langchain's RecursiveCharacterTextSplitter.
+    - Chunks never exceed chunk_size; overlap must be smaller than chunk_size (ValueError otherwise).
+
+--------------------------------------------------------------------
+"""
@@ -1,25 +1,21 @@
 # app/utils/validators.py
 
-import re
 import logging
 
 logger = logging.getLogger(__name__)
 
-USERNAME_REGEX = r"^[a-zA-Z0-9]{8,}$"
-
 def is_valid_username(username: str) -> bool:
     """
     Checks if the username is valid:
-    - At least 8 characters
+    - 8 to 32 characters
     - Letters and numbers only
     - At least one letter present
+    String methods only (C-level scans, no regex): ASCII + alphanumeric, and not all digits
+    means at least one ASCII letter.
     """
-    username = (username or "").lower()
-    valid = (
-        bool(re.fullmatch(r'[A-Za-z0-9]{8,}', username))
-        and re.search(r'[A-Za-z]', username) is not None
-    )
-    if not valid:
+    u = username or ""
+    valid = 8 <= len(u) <= 32 and u.isascii() and u.isalnum() and not u.isdigit()
+    if not valid and logger.isEnabledFor(logging.DEBUG):  # Skip formatting on hot paths when debug is off
         logger.debug(f"Username validation failed: '{username}'")
     return valid
 
@@ -28,37 +24,67 @@ def is_valid_email(email: str) -> bool:
     Basic email format check.
     - Only validates pattern: local@domain.tld
     - Does NOT check deliverability or advanced syntax
+    Same rules as the pattern [^@]+@[^@]+\.[^@]+ (exactly one "@", a "." inside the domain),
+    checked with str.find instead of the regex engine.
     """
-    valid = bool(re.fullmatch(r"[^@]+@[^@]+\.[^@]+", email or ""))
-    if not valid:
+    s = email or ""
+    at = s.find("@")
+    valid = 0 < at < len(s) - 1 and s.find("@", at + 1) == -1 and 0 <= s.find(".", at + 2) < len(s) - 1
+    if not valid and logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"Email validation failed: '{email}'")
     return valid
 
 def normalize_username(username: str) -> str:
-    """Lowercases and strips input for consistent username handling."""
-    normalized = (username or "").lower().strip()
-    logger.debug(f"Normalized username: '{username}' -> '{normalized}'")
-    return normalized
+    """
+    Case-folds and strips input for consistent username handling.
+    Already-normalized ASCII input (the common case) is returned as-is, without a new string.
+    """
+    s = (username or "").strip()
+    if s.isascii() and s.islower():
+        return s
+    return s.casefold()
 
 def normalize_email(email: str) -> str:
-    """Lowercases and strips input for consistent email handling."""
-    normalized = (email or "").lower().strip()
-    logger.debug(f"Normalized email: '{email}' -> '{normalized}'")
-    return normalized
+    """
+    Lowercases and strips input for consistent email handling (same ASCII fast path as usernames).
+    lower(), not casefold(): stored emails and Supabase Auth use plain lowercasing, and casefold
+    would rewrite e.g. "ß" to "ss" and no longer match existing accounts.
+    """
+    s = (email or "").strip()
+    if s.isascii() and s.islower():
+        return s
+    return s.lower()
 
 def is_strong_password(password: str) -> bool:
     """
     Password strength policy:
-    - At least 8 characters
+    - 8 to 128 characters, no line breaks
     - One uppercase, one lowercase, one digit, one special character
+    Single pass over the characters (stops as soon as all four classes are seen).
     """
-    valid = bool(
-        re.fullmatch(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[^\w\s]).{8,}$', password or "")
-    )
+    valid = 8 <= len(password or "") <= 128 and "\n" not in password and _has_all_char_classes(password)
     if not valid:
         logger.debug("Password failed strength validation.")
     return valid
 
+def _has_all_char_classes(password: str) -> bool:
+    """ASCII lowercase, ASCII uppercase, digit, and special (not a word char, not whitespace)."""
+    has_lower = has_upper = has_digit = has_special = False
+    for c in password:
+        if "a" <= c <= "z":
+            has_lower = True
+        elif "A" <= c <= "Z":
+            has_upper = True
+        elif c.isdecimal():
+            has_digit = True
+        elif not (c.isalnum() or c == "_" or c.isspace()):
+            has_special = True
+        else:
+            continue
+        if has_lower and has_upper and has_digit and has_special:
+            return True
+    return False
+
 """
 ----------------------------------------------------------
 Purpose:
@@ -74,14 +100,17 @@ Used By:
     - Any endpoint requiring strict credential validation.
 
 Good Practices:
-    - Centralize regex-based checks (easy to update policy).
+    - Centralize checks (easy to update policy); usernames, emails and the password policy
+      are plain string scans (no regex engine).
+    - Debug logs are guarded with isEnabledFor, so failed attempts cost no string formatting in production.
+    - Normalizers return already-normalized ASCII input unchanged (no allocation, no logging).
     - Avoid over-validating emails—do not reject valid but rare addresses.
     - Always normalize usernames and emails before DB storage/checks.
 
 Security & Scalability:
     - Ensures password policies for strong credentials.
     - Defends against basic input tampering and common enumeration attacks.
-    - Regex limits avoid accidental DoS from catastrophic backtracking.
+    - Length caps bound the work per input (usernames capped at 32, passwords at 128).
 
 ----------------------------------------------------------
 """
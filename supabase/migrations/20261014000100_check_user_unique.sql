@@ -0,0 +1,21 @@
+-- supabase/migrations/20261014000100_check_user_unique.sql
+--
+-- Single round-trip uniqueness check for /api/auth/register.
+-- Returns 'email' or 'username' for the first conflicting field, or NULL if both are free.
+
+create or replace function public.check_user_unique(p_email text, p_username text)
+returns text
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select case when u.email = p_email then 'email' else 'username' end
+    from public.users u
+    where u.email = p_email or u.username = p_username
+    order by (u.email = p_email) desc
+    limit 1;
+$$;
+
+revoke all on function public.check_user_unique(text, text) from public, anon, authenticated;
+grant execute on function public.check_user_unique(text, text) to service_role;
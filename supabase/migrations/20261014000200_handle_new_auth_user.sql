@@ -0,0 +1,31 @@
+-- supabase/migrations/20261014000200_handle_new_auth_user.sql
+--
+-- Copies every new auth.users row into public.users inside the same transaction,
+-- so /api/auth/register no longer performs its own INSERT (one less round-trip, no race).
+-- Profile fields come from the user_metadata passed to auth.admin.create_user.
+
+create or replace function public.handle_new_auth_user()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.users (id, email, first_name, last_name, username, plan, profile_uploaded)
+    values (
+        new.id,
+        lower(new.email),
+        new.raw_user_meta_data ->> 'first_name',
+        new.raw_user_meta_data ->> 'last_name',
+        lower(new.raw_user_meta_data ->> 'username'),
+        'free',
+        false
+    );
+    return new;
+end;
+$$;
+
+drop trigger if exists on_auth_user_created on auth.users;
+create trigger on_auth_user_created
+    after insert on auth.users
+    for each row execute function public.handle_new_auth_user();
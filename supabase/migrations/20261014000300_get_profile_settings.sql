@@ -0,0 +1,42 @@
+-- supabase/migrations/20261014000300_get_profile_settings.sql
+--
+-- Everything /api/auth/profile-settings needs in one round-trip:
+-- the user row, the profile upload history (newest first) and the OpenAI key/model.
+-- Returns NULL when the user does not exist.
+
+create or replace function public.get_profile_settings(p_user_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'user', to_jsonb(u),
+        'uploads', coalesce((
+            select jsonb_agg(
+                jsonb_build_object(
+                    'id', p.id,
+                    'original_filename', p.original_filename,
+                    'embedding_model', p.embedding_model,
+                    'vector_count', p.vector_count,
+                    'is_active', p.is_active,
+                    'created_at', p.created_at
+                )
+                order by p.created_at desc
+            )
+            from public.profiles p
+            where p.user_id = u.id
+        ), '[]'::jsonb),
+        'openai', (
+            select jsonb_build_object('api_key', k.api_key, 'model', k.model)
+            from public.openai_keys k
+            where k.user_id = u.id
+        )
+    )
+    from public.users u
+    where u.id = p_user_id;
+$$;
+
+revoke all on function public.get_profile_settings(uuid) from public, anon, authenticated;
+grant execute on function public.get_profile_settings(uuid) to service_role;
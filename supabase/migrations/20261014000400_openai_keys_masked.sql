@@ -0,0 +1,45 @@
+-- supabase/migrations/20261014000400_openai_keys_masked.sql
+--
+-- Stores the display form of the OpenAI key ("sk-abc...wxyz") next to the key itself,
+-- so /profile-settings never reads (or slices) the real key.
+
+alter table public.openai_keys
+    add column if not exists api_key_masked text;
+
+update public.openai_keys
+set api_key_masked = left(api_key, 6) || '...' || right(api_key, 4)
+where api_key is not null and api_key_masked is null;
+
+create or replace function public.get_profile_settings(p_user_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'user', to_jsonb(u),
+        'uploads', coalesce((
+            select jsonb_agg(
+                jsonb_build_object(
+                    'id', p.id,
+                    'original_filename', p.original_filename,
+                    'embedding_model', p.embedding_model,
+                    'vector_count', p.vector_count,
+                    'is_active', p.is_active,
+                    'created_at', p.created_at
+                )
+                order by p.created_at desc
+            )
+            from public.profiles p
+            where p.user_id = u.id
+        ), '[]'::jsonb),
+        'openai', (
+            select jsonb_build_object('api_key_masked', k.api_key_masked, 'model', k.model)
+            from public.openai_keys k
+            where k.user_id = u.id
+        )
+    )
+    from public.users u
+    where u.id = p_user_id;
+$$;
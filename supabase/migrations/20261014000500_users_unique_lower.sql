@@ -0,0 +1,11 @@
+-- supabase/migrations/20261014000500_users_unique_lower.sql
+--
+-- Email/username uniqueness is enforced by the database instead of a pre-check from /register.
+-- A duplicate username makes the on_auth_user_created trigger fail, which aborts the
+-- auth.users insert in the same transaction (no orphaned Auth user, no race window).
+
+create unique index if not exists users_email_lower_idx on public.users (lower(email));
+create unique index if not exists users_username_lower_idx on public.users (lower(username));
+
+-- Superseded by the unique indexes above
+drop function if exists public.check_user_unique(text, text);
@@ -0,0 +1,30 @@
+-- supabase/migrations/20261014000600_deactivate_and_get_key.sql
+--
+-- One round-trip for /api/profile/upload-file: returns the user's OpenAI key/model and,
+-- only when a key exists, marks every active profile inactive in the same transaction.
+-- No row is returned (and nothing is deactivated) for users without a key, so a rejected
+-- upload never loses the current active profile.
+-- api_key is returned as stored (AES-GCM ciphertext); the backend decrypts it.
+
+create or replace function public.deactivate_and_get_key(p_user_id uuid)
+returns table (api_key text, model text)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    return query
+        select k.api_key, k.model
+        from public.openai_keys k
+        where k.user_id = p_user_id;
+
+    if found then
+        update public.profiles
+        set is_active = false
+        where user_id = p_user_id and is_active;
+    end if;
+end;
+$$;
+
+revoke all on function public.deactivate_and_get_key(uuid) from public, anon, authenticated;
+grant execute on function public.deactivate_and_get_key(uuid) to service_role;
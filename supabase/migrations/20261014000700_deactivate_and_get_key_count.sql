@@ -0,0 +1,36 @@
+-- supabase/migrations/20261014000700_deactivate_and_get_key_count.sql
+--
+-- deactivate_and_get_key also returns how many profiles it deactivated, so /upload-file can skip
+-- the Qdrant cleanup for users without a previous profile (no active profile => no vectors).
+-- Same contract otherwise: no row (and nothing deactivated) when the user has no OpenAI key.
+-- The return type changes, so the function is dropped and recreated.
+
+drop function if exists public.deactivate_and_get_key(uuid);
+
+create function public.deactivate_and_get_key(p_user_id uuid)
+returns table (api_key text, model text, deactivated integer)
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    select k.api_key, k.model
+    into api_key, model
+    from public.openai_keys k
+    where k.user_id = p_user_id;
+
+    if not found then
+        return;
+    end if;
+
+    update public.profiles
+    set is_active = false
+    where user_id = p_user_id and is_active;
+    get diagnostics deactivated = row_count;
+
+    return next;
+end;
+$$;
+
+revoke all on function public.deactivate_and_get_key(uuid) from public, anon, authenticated;
+grant execute on function public.deactivate_and_get_key(uuid) to service_role;
@@ -0,0 +1,35 @@
+-- supabase/migrations/20261014000800_handle_new_auth_user_username_taken.sql
+--
+-- Re-raises a duplicate username from on_auth_user_created as a distinguishable error
+-- (errcode 23505, message 'username_taken'), so /api/auth/register can tell it apart from
+-- any other failure inside the trigger. Other unique violations are re-raised unchanged.
+
+create or replace function public.handle_new_auth_user()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_constraint text;
+begin
+    insert into public.users (id, email, first_name, last_name, username, plan, profile_uploaded)
+    values (
+        new.id,
+        lower(new.email),
+        new.raw_user_meta_data ->> 'first_name',
+        new.raw_user_meta_data ->> 'last_name',
+        lower(new.raw_user_meta_data ->> 'username'),
+        'free',
+        false
+    );
+    return new;
+exception
+    when unique_violation then
+        get stacked diagnostics v_constraint = constraint_name;
+        if v_constraint = 'users_username_lower_idx' then
+            raise exception using errcode = '23505', message = 'username_taken';
+        end if;
+        raise;
+end;
+$$;
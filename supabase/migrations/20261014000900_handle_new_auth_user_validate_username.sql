@@ -0,0 +1,46 @@
+-- supabase/migrations/20261014000900_handle_new_auth_user_validate_username.sql
+--
+-- Validates user_metadata.username inside on_auth_user_created, with the same rules as
+-- app/utils/validators.is_valid_username: 8-32 characters, [a-z0-9] only (after lower()),
+-- at least one letter. An invalid or missing username raises 'invalid_username', which
+-- aborts the auth.users insert, so no row can reach public.users without a valid username.
+--
+-- Public signups: accounts are meant to be created only by /api/auth/register through the
+-- Admin API, so "Allow new users to sign up" should stay disabled in the Supabase Auth settings
+-- (the Admin API keeps working). The check below still holds if it is ever re-enabled: a
+-- client-side signUp() with arbitrary user_metadata cannot create a user with a bad username.
+
+create or replace function public.handle_new_auth_user()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_username text := lower(new.raw_user_meta_data ->> 'username');
+    v_constraint text;
+begin
+    if v_username is null or v_username !~ '^[a-z0-9]{8,32}$' or v_username !~ '[a-z]' then
+        raise exception using errcode = '22023', message = 'invalid_username';
+    end if;
+
+    insert into public.users (id, email, first_name, last_name, username, plan, profile_uploaded)
+    values (
+        new.id,
+        lower(new.email),
+        new.raw_user_meta_data ->> 'first_name',
+        new.raw_user_meta_data ->> 'last_name',
+        v_username,
+        'free',
+        false
+    );
+    return new;
+exception
+    when unique_violation then
+        get stacked diagnostics v_constraint = constraint_name;
+        if v_constraint = 'users_username_lower_idx' then
+            raise exception using errcode = '23505', message = 'username_taken';
+        end if;
+        raise;
+end;
+$$;